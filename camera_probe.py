@@ -0,0 +1,385 @@
+import json
+import os
+import time
+
+import cv2
+
+
+# =============================
+# Candidates
+# =============================
+CANDIDATE_FOURCC = ("MJPG", "YUYV")
+CANDIDATE_SIZES = ((640, 480), (800, 600), (960, 540), (1280, 720))
+CANDIDATE_FPS = (60, 30)
+
+# "acceptable detection": enough pixels for MediaPipe at arm's length,
+# a usable frame rate and a picture that is not black
+MIN_WIDTH = 640
+MIN_FPS = 20.0
+MIN_MEAN_LUMA = 8.0
+
+# MediaPipe check on the chosen mode: share of frames with a hand found
+MIN_HAND_RATIO = 0.5
+
+# when CAP_PROP_BUFFERSIZE cannot be read back, assume the usual V4L2 / AVFoundation queue
+DEFAULT_BUFFERS = 4
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".gesture_mouse_control", "camera_modes.json")
+
+
+def fourcc_str(code):
+    code = int(code)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def read_mode(cap):
+    return {
+        "fourcc": fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": float(cap.get(cv2.CAP_PROP_FPS)),
+        "buffers": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+def apply_mode(cap, mode):
+    """
+    FOURCC first: many UVC drivers only offer high FPS / sizes for MJPG.
+    Returns what the driver actually accepted.
+    """
+    if mode.get("fourcc"):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode["fourcc"]))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode["width"])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode["height"])
+    if mode.get("fps"):
+        cap.set(cv2.CAP_PROP_FPS, mode["fps"])
+    # 只保留最新一帧，避免排队延迟
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return read_mode(cap)
+
+
+def same_mode(a, b):
+    return (a["fourcc"] == b["fourcc"]
+            and a["width"] == b["width"] and a["height"] == b["height"]
+            and abs(a["fps"] - b["fps"]) < 1.0)
+
+
+def list_modes(cap):
+    """
+    Try every candidate combination and keep the distinct modes the driver accepted.
+    (OpenCV has no portable "enumerate formats" API, so we ask and read back.)
+    """
+    modes = []
+    for fcc in CANDIDATE_FOURCC:
+        for w, h in CANDIDATE_SIZES:
+            for fps in CANDIDATE_FPS:
+                got = apply_mode(cap, {"fourcc": fcc, "width": w, "height": h, "fps": fps})
+                if got["width"] <= 0 or got["height"] <= 0:
+                    continue
+                if not any(same_mode(got, m) for m in modes):
+                    modes.append(got)
+    return modes
+
+
+def bench_mode(cap, mode, frames=20, warmup=5, flip=True):
+    """
+    Measures, per frame:
+    - grab: wait for the next frame from the driver (=> real frame interval)
+    - decode: retrieve (MJPG decode / YUYV convert)
+    - prep: flip + BGR->RGB, i.e. what the gesture loop does before MediaPipe
+    """
+    got = apply_mode(cap, mode)
+    for _ in range(warmup):
+        cap.read()
+
+    grab = decode = prep = 0.0
+    luma = 0.0
+    n = 0
+    t_start = time.perf_counter()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        if not cap.grab():
+            break
+        t1 = time.perf_counter()
+        ok, frame = cap.retrieve()
+        t2 = time.perf_counter()
+        if not ok or frame is None:
+            break
+        if flip:
+            frame = cv2.flip(frame, 1)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t3 = time.perf_counter()
+
+        grab += t1 - t0
+        decode += t2 - t1
+        prep += t3 - t2
+        luma += float(rgb[::8, ::8].mean())
+        n += 1
+    elapsed = time.perf_counter() - t_start
+
+    result = dict(got)
+    if n == 0:
+        result.update(ok=False, measured_fps=0.0, latency_ms=float("inf"))
+        return result
+
+    interval_ms = elapsed * 1000.0 / n
+    decode_ms = decode * 1000.0 / n
+    prep_ms = prep * 1000.0 / n
+    buffers = got["buffers"] if got["buffers"] > 0 else DEFAULT_BUFFERS
+    # exposure/transfer (~half a frame on average) + frames queued in the driver + CPU work
+    latency_ms = interval_ms * (0.5 + max(0, buffers - 1)) + decode_ms + prep_ms
+
+    result.update(
+        ok=True,
+        measured_fps=1000.0 / interval_ms,
+        grab_ms=grab * 1000.0 / n,
+        decode_ms=decode_ms,
+        prep_ms=prep_ms,
+        mean_luma=luma / n,
+        latency_ms=latency_ms,
+    )
+    return result
+
+
+def acceptable(r, min_width=MIN_WIDTH, min_fps=MIN_FPS):
+    return (r.get("ok", False)
+            and r["width"] >= min_width
+            and r["measured_fps"] >= min_fps
+            and r.get("mean_luma", 0.0) >= MIN_MEAN_LUMA)
+
+
+def check_hands(cap, mode, hands, frames=15, input_width=None, flip=True):
+    """
+    Run hands.process on a few frames of `mode` (with the same flip / resize as the
+    gesture loop). Returns (share of frames with a hand, mean inference ms).
+    """
+    apply_mode(cap, mode)
+    found = n = 0
+    infer = 0.0
+    for _ in range(frames):
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            break
+        if flip:
+            frame = cv2.flip(frame, 1)
+        fh, fw = frame.shape[:2]
+        if input_width and fw > input_width:
+            frame = cv2.resize(frame, (input_width, int(round(fh * input_width / fw))),
+                               interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t0 = time.perf_counter()
+        res = hands.process(rgb)
+        infer += time.perf_counter() - t0
+        n += 1
+        if res.multi_hand_landmarks:
+            found += 1
+    if n == 0:
+        return 0.0, 0.0
+    return found / n, infer * 1000.0 / n
+
+
+def probe(cap, frames=20, min_width=MIN_WIDTH, min_fps=MIN_FPS, verbose=True,
+          hands=None, input_width=None):
+    """
+    List + benchmark modes, return (best_mode, all_results).
+    best = lowest estimated end-to-end latency among acceptable modes.
+
+    With `hands` (a MediaPipe Hands object) the acceptable modes are also run
+    through hands.process, fastest first, and the first one where a hand is found
+    in >= MIN_HAND_RATIO of the frames wins. If no mode sees a hand (nobody in
+    front of the camera) the choice falls back to latency only and
+    best["detection_checked"] is False.
+    """
+    results = []
+    for mode in list_modes(cap):
+        if mode["width"] < min_width:
+            continue
+        r = bench_mode(cap, mode, frames=frames)
+        results.append(r)
+        if verbose:
+            print(f"   {r['fourcc'] or '?':<4} {r['width']}x{r['height']} @{r['fps']:.0f} "
+                  f"-> {r['measured_fps']:.1f} fps, decode {r.get('decode_ms', 0):.1f} ms, "
+                  f"latency ~{r['latency_ms']:.0f} ms")
+
+    ok = sorted((r for r in results if acceptable(r, min_width, min_fps)), key=lambda r: r["latency_ms"])
+    if not ok:
+        return None, results
+    if hands is None:
+        ok[0]["detection_checked"] = False
+        return ok[0], results
+
+    if verbose:
+        print("   checking hand detection (keep your hand in view)...")
+    for r in ok:
+        r["hand_ratio"], r["infer_ms"] = check_hands(cap, r, hands, input_width=input_width)
+        if verbose:
+            print(f"   {r['fourcc'] or '?':<4} {r['width']}x{r['height']} @{r['fps']:.0f} "
+                  f"-> hand in {r['hand_ratio']:.0%} of frames, inference {r['infer_ms']:.1f} ms")
+        if r["hand_ratio"] >= MIN_HAND_RATIO:
+            r["detection_checked"] = True
+            return r, results
+
+    if verbose:
+        print("⚠️  No hand seen while probing: mode chosen on latency only "
+              "(re-probe with your hand in view).")
+    ok[0]["detection_checked"] = False
+    return ok[0], results
+
+
+# =============================
+# Per-device cache
+# =============================
+def device_name(index):
+    """
+    Human-readable name (+ USB serial when the device has one) of camera `index`.
+    Only Linux / V4L2 exposes this without extra packages; elsewhere returns "".
+    """
+    base = f"/sys/class/video4linux/video{int(index)}"
+    try:
+        with open(os.path.join(base, "name"), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return ""
+
+    # device -> USB interface, its parent is the USB device (idVendor / idProduct / serial)
+    usb = os.path.dirname(os.path.realpath(os.path.join(base, "device")))
+    ids = []
+    for attr in ("idVendor", "idProduct", "serial"):
+        try:
+            with open(os.path.join(usb, attr), "r", encoding="utf-8") as f:
+                ids.append(f.read().strip())
+        except OSError:
+            pass
+    return "/".join([name] + ids)
+
+
+def device_key(index, cap):
+    """
+    backend:index[:name]. Without a name (macOS / Windows) a different camera
+    plugged in at the same index reuses the cached mode as long as the driver accepts it.
+    """
+    try:
+        backend = cap.getBackendName()
+    except cv2.error:
+        backend = "unknown"
+    name = device_name(index)
+    return f"{backend}:{index}:{name}" if name else f"{backend}:{index}"
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(data, path=CACHE_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️  Cannot save camera cache: {e}")
+
+
+def remember_mode(cache, key, best, path=CACHE_PATH):
+    mode = {k: best[k] for k in ("fourcc", "width", "height", "fps")}
+    cache[key] = dict(mode, latency_ms=round(best["latency_ms"], 1),
+                      detection_checked=bool(best.get("detection_checked")), probed_at=time.time())
+    save_cache(cache, path)
+    return mode
+
+
+def open_camera(index=0, width=640, height=480, probe_modes=True, reprobe=False,
+                cache_path=CACHE_PATH, hands=None, input_width=None):
+    """
+    Open the camera in the best mode for this device.
+    First start: probe + benchmark (a few seconds), then cache the choice.
+    Later starts: apply the cached mode, probe again if the driver refuses it or
+    (with hands) if it never passed the MediaPipe check and still does not.
+    hands / input_width: check the candidate modes with MediaPipe (see probe()).
+    Returns an opened cv2.VideoCapture or None.
+    """
+    cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        return None
+
+    fallback = {"fourcc": "", "width": width, "height": height, "fps": 0}
+    if not probe_modes:
+        apply_mode(cap, fallback)
+        return cap
+
+    key = device_key(index, cap)
+    cache = load_cache(cache_path)
+    cached = cache.get(key)
+
+    if cached and not reprobe:
+        got = apply_mode(cap, cached)
+        if not same_mode(got, cached):
+            print("📷 Cached camera mode rejected, probing again...")
+        elif cached.get("detection_checked") or hands is None:
+            print(f"📷 Camera mode (cached): {got['fourcc']} {got['width']}x{got['height']} @{got['fps']:.0f}")
+            return cap
+        else:
+            # chosen on latency only last time (no hand in view): check it now,
+            # probe everything again if MediaPipe still finds no hand
+            ratio, _ = check_hands(cap, cached, hands, input_width=input_width)
+            if ratio >= MIN_HAND_RATIO:
+                cached["detection_checked"] = True
+                save_cache(cache, cache_path)
+                print(f"📷 Camera mode (cached, hand check passed): {got['fourcc']} "
+                      f"{got['width']}x{got['height']} @{got['fps']:.0f}")
+                return cap
+            print("📷 Cached camera mode never passed the hand check, probing again...")
+
+    print("📷 Probing camera modes...")
+    best, _ = probe(cap, hands=hands, input_width=input_width)
+    if best is None:
+        print("⚠️  No camera mode passed the checks, using driver defaults.")
+        apply_mode(cap, fallback)
+        return cap
+
+    mode = remember_mode(cache, key, best, cache_path)
+    got = apply_mode(cap, mode)
+    print(f"📷 Camera mode: {got['fourcc']} {got['width']}x{got['height']} @{got['fps']:.0f} "
+          f"(~{best['latency_ms']:.0f} ms)")
+    return cap
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="List and benchmark camera modes")
+    ap.add_argument("--index", type=int, default=0)
+    ap.add_argument("--frames", type=int, default=30)
+    ap.add_argument("--min-width", type=int, default=MIN_WIDTH)
+    ap.add_argument("--save", action="store_true", help="store the best mode in the cache")
+    ap.add_argument("--no-hands", action="store_true", help="skip the MediaPipe detection check")
+    args = ap.parse_args()
+
+    cap = cv2.VideoCapture(args.index)
+    if not cap.isOpened():
+        raise SystemExit("❌ Cannot open camera.")
+    hands = None
+    if not args.no_hands:
+        import mediapipe as mp
+        hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.6,
+                                         min_tracking_confidence=0.6)
+    try:
+        best, _ = probe(cap, frames=args.frames, min_width=args.min_width, hands=hands)
+        if best is None:
+            print("⚠️  No acceptable mode.")
+        else:
+            print(f"✅ Best: {best['fourcc']} {best['width']}x{best['height']} @{best['fps']:.0f} "
+                  f"(~{best['latency_ms']:.0f} ms)")
+            if args.save:
+                remember_mode(load_cache(), device_key(args.index, cap), best)
+    finally:
+        cap.release()
+        if hands is not None:
+            hands.close()
@@ -0,0 +1,129 @@
+import random
+import sys
+
+from gesture_events import CLICK, DRAG_START, DRAG_END
+from gesture_logic import engine_config, Landmark
+from landmark_traces import replay, score_events, synthetic_hand, synthetic_trace
+
+
+# =============================
+# Replay regression checks for the gesture logic
+# =============================
+# Everything below is pure Python (no camera, MediaPipe or pyautogui): each case is
+# a small synthetic landmark trace replayed through the landmark filter and
+# GestureMachine exactly like run_gesture does (landmark_traces.replay).
+FPS = 30
+
+
+def _trace(segments, fps=FPS, jitter=0.0, seed=0):
+    """
+    segments: [(pinch distances, lost)], one frame per distance; lost => no hand.
+    jitter: gaussian noise (normalized units) on every landmark coordinate.
+    """
+    rng = random.Random(seed)
+    frames, t = [], 0.0
+    for pinches, lost in segments:
+        for d in pinches:
+            lm = None
+            if not lost:
+                lm = [Landmark(x + rng.gauss(0, jitter), y + rng.gauss(0, jitter), z) if jitter
+                      else Landmark(x, y, z) for x, y, z in synthetic_hand(0.5, 0.5, d)]
+            frames.append((round(t, 4), lm))
+            t += 1.0 / fps
+    return {"path": "<check>", "meta": {"fps": fps}, "spans": [], "frames": frames}
+
+
+def _actions(events):
+    return [e for e in events if e.kind in (CLICK, DRAG_START)]
+
+
+def _fmt(events):
+    return ", ".join(f"{e.kind}@{e.t:.2f}" for e in events if e.kind in (CLICK, DRAG_START, DRAG_END)) or "-"
+
+
+def check_synthetic_trace(cfg):
+    """Built-in soak trace: every labeled span hit, nothing else fired."""
+    tr = synthetic_trace(FPS)
+    events = replay(tr, cfg)
+    sc = score_events(tr["spans"], events)
+    missed = sum(sc[k]["spans"] - sc[k]["hit"] for k in ("click", "drag", "scroll"))
+    return missed == 0 and sc["false_actions"] == 0, f"missed={missed} false={sc['false_actions']}"
+
+
+def check_near_miss(cfg):
+    """Fingers close fast but stop above PINCH_ON: a predicted pinch that never confirms."""
+    stop = cfg["PINCH_ON"] * 1.15  # inside the predictor's onset gate (PINCH_LEAD)
+    tr = _trace([([0.12] * 20, False), ([0.09, 0.06] + [stop] * 10 + [0.09, 0.12] + [0.12] * 10, False)])
+    events = replay(tr, cfg)
+    return not _actions(events), _fmt(events)
+
+
+def check_bridged_frames(cfg):
+    """
+    Fast closing motion cut off by a short dropout: the bridged (extrapolated)
+    landmarks keep closing below PINCH_ON, but must not confirm the pinch.
+    """
+    tr = _trace([([0.12] * 20, False), ([0.09, 0.06], False), ([0] * 5, True), ([0.12] * 15, False)])
+    events = replay(tr, cfg)
+    return not _actions(events), _fmt(events)
+
+
+def check_long_dropout(cfg):
+    """Hand leaves view during a drag: DRAG_END from lost() after BRIDGE_TIME + LOST_RELEASE_TIME."""
+    tr = _trace([([0.12] * 20, False), ([0.09, 0.06, 0.035] + [0.02] * 15, False),
+                 ([0] * 40, True), ([0.12] * 10, False)])
+    gone = tr["frames"][38][0]
+    back = tr["frames"][78][0]
+    events = replay(tr, cfg)
+    starts = [e for e in events if e.kind == DRAG_START]
+    ends = [e for e in events if e.kind == DRAG_END]
+    expect = gone + cfg["BRIDGE_TIME"] + cfg["LOST_RELEASE_TIME"]
+    ok = (len(starts) == 1 and len(ends) == 1 and starts[0].t < gone
+          and expect - 1e-6 <= ends[0].t <= expect + 2.0 / FPS and ends[0].t < back)
+    return ok, f"{_fmt(events)} (expected drag_end ~{expect:.2f})"
+
+
+def check_jitter(cfg, sigma=0.004, gap=0.008, seeds=10, seconds=10.0):
+    """
+    Hand resting with thumb-index distance just above PINCH_ON (gap, well inside
+    the PINCH_ON .. PINCH_OFF hysteresis) plus landmark noise on every point:
+    with the landmark filter on, no click / mouseDown.
+    """
+    if gap >= cfg["PINCH_OFF"] - cfg["PINCH_ON"]:
+        return False, "gap must stay inside the hysteresis band"
+    rest = cfg["PINCH_ON"] + gap
+    ramp = [0.12 + (rest - 0.12) * i / 60 for i in range(60)]  # slow approach, no predicted onset
+    fired = []
+    for seed in range(seeds):
+        tr = _trace([(ramp + [rest] * int(seconds * FPS), False)], jitter=sigma, seed=seed)
+        fired.extend(_actions(replay(tr, cfg)))
+    return not fired, f"{len(fired)} actions in {seeds} x {seconds:.0f}s (sigma={sigma}, PINCH_ON+{gap})"
+
+
+CHECKS = [
+    ("synthetic trace scores clean", check_synthetic_trace, {}),
+    ("no click on a near miss", check_near_miss, {}),
+    ("no action on bridged frames", check_bridged_frames, {}),
+    ("drag_end after a long dropout", check_long_dropout, {}),
+    ("no false clicks from jitter near PINCH_ON (filter on)", check_jitter, {"landmark_filter": True}),
+]
+
+
+def regression_checks(params=None):
+    """
+    Runs every case with engine_config(params) (predictive pinch and landmark filter
+    at their defaults unless params change them). Returns (ok, [(name, passed, detail)]).
+    """
+    results = []
+    for name, fn, extra in CHECKS:
+        passed, detail = fn(engine_config({**(params or {}), **extra}))
+        results.append((name, passed, detail))
+        print(f"  {'✅' if passed else '❌'} {name}: {detail}")
+    ok = all(passed for _, passed, _ in results)
+    print("✅ Gesture checks passed" if ok else "❌ Gesture checks failed")
+    return ok, results
+
+
+if __name__ == "__main__":
+    ok, _ = regression_checks()
+    sys.exit(0 if ok else 1)
@@ -1,211 +1,213 @@
 import cv2
 import mediapipe as mp
-import pyautogui
-import math
 import time
 
+from camera_probe import open_camera
+from hand_tracker import DetectTrackScheduler
+from quality_controller import QualityController, QUALITY_LEVELS
+from gesture_events import MOVE, CLICK, DRAG_START, DRAG_END, SCROLL
+from gesture_logic import engine_config, GestureMachine
+from landmark_filter import LandmarkFilter
+from landmark_traces import TraceRecorder
+from sampling_profiler import STAGE_TIMES
 
-pyautogui.FAILSAFE = False
-pyautogui.PAUSE = 0
 
+# imported on first use: pyautogui needs a display, replay / soak runs do not
+pyautogui = None
 
-def clamp(v, lo, hi):
-    return max(lo, min(hi, v))
 
+def _gui():
+    global pyautogui
+    if pyautogui is None:
+        import pyautogui as gui
+        gui.FAILSAFE = False
+        gui.PAUSE = 0
+        pyautogui = gui
+    return pyautogui
 
-def dist(a, b):
-    return math.hypot(a.x - b.x, a.y - b.y)
 
-
-def finger_extended_y(lm, tip, pip, mcp):
-    return (lm[tip].y < lm[pip].y) and (lm[pip].y < lm[mcp].y)
-
-
-def two_finger_pose(lm):
-    idx_ok = finger_extended_y(lm, 8, 6, 5)
-    mid_ok = finger_extended_y(lm, 12, 10, 9)
-    return idx_ok and mid_ok
+def apply_event(ev):
+    """
+    GestureEvent -> real mouse action
+    """
+    gui = _gui()
+    if ev.kind == MOVE:
+        gui.moveTo(ev.x, ev.y, duration=0)
+    elif ev.kind == CLICK:
+        gui.click()
+    elif ev.kind == DRAG_START:
+        gui.mouseDown()
+    elif ev.kind == DRAG_END:
+        gui.mouseUp()
+    elif ev.kind == SCROLL:
+        gui.scroll(ev.amount)
+
+
+def make_hands(settings):
+    return mp.solutions.hands.Hands(
+        max_num_hands=1,
+        model_complexity=settings["model_complexity"],
+        min_detection_confidence=settings["min_detection_confidence"],
+        min_tracking_confidence=settings["min_tracking_confidence"],
+    )
 
 
-def run_gesture(stop_event, params, show_preview=False):
+def run_gesture(stop_event, params, show_preview=False, bus=None, metrics=None,
+                source=None, apply=apply_event, screen_size=None, hands_factory=make_hands):
     """
     ✅ macOS 稳定版：默认不在子线程里开 OpenCV 预览窗口（imshow 会崩）
     show_preview=True 仅用于你将来改成主线程显示时
+    bus: optional EventBus，识别出的动作同时发布给订阅者（非阻塞）
+    metrics: optional dict，每秒更新一次（fps / 推理耗时 / 当前画质档位 ...）
+    source: optional VideoCapture-like object (read / get / release) instead of the camera;
+            if it has now(), that clock (e.g. trace time) drives the gesture logic
+    apply: what to do with each GestureEvent (default: real mouse via pyautogui)
+    screen_size: (w, h) in pixels; None => pyautogui.size()
+    hands_factory: settings -> Hands-like object (process(rgb) / close())
     """
 
     # ---------- map user params -> engine params ----------
-    SMOOTH_ALPHA = float(params.get("smooth", 0.35))
-
-    click_sens = float(params.get("click_sens", 0.6))
-    # click_sens 越大 => 更容易判定 pinch
-    PINCH_ON = 0.030 + (click_sens - 0.3) * (0.050 - 0.030) / (1.0 - 0.3)
-    PINCH_ON = clamp(PINCH_ON, 0.028, 0.060)
-    PINCH_OFF = PINCH_ON + 0.020
-
-    CLICK_TIME = float(params.get("drag_delay_ms", 160)) / 1000.0
-
-    ARM_FRAMES = int(round(6 - (click_sens - 0.3) * (6 - 3) / (1.0 - 0.3)))
-    ARM_FRAMES = max(2, min(8, ARM_FRAMES))
-
-    DRAG_MOVE_PX = 15
-
-    SCROLL_SCALE = int(params.get("scroll_speed", 500))
-    SCROLL_DEADZONE = 0.004
+    cfg = engine_config(params)
+    FLIP = cfg["FLIP"]
 
-    MIDDLE_IGNORE_TIME = 0.28
-    OFFSET_X = -20
-    OFFSET_Y = 0
-    FLIP = True
-
-    screen_w, screen_h = pyautogui.size()
+    screen_w, screen_h = screen_size or _gui().size()
 
     # ---------- MediaPipe ----------
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        max_num_hands=1,
-        min_detection_confidence=0.6,
-        min_tracking_confidence=0.6,
-    )
-
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("❌ Cannot open camera.")
-        hands.close()
-        return
-
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_BRIGHTNESS, 150)  # 增加亮度
+    if cfg["QUALITY"] == "auto":
+        settings = QUALITY_LEVELS[-1]
+    else:
+        settings = QUALITY_LEVELS[max(0, min(len(QUALITY_LEVELS) - 1, int(cfg["QUALITY"])))]
+    hands = hands_factory(settings)
+
+    if source is not None:
+        cap = source
+    else:
+        cap = open_camera(0, 640, 480, probe_modes=cfg["CAMERA_PROBE"], reprobe=cfg["CAMERA_REPROBE"],
+                          hands=hands, input_width=settings["input_width"])
+        if cap is None:
+            print("❌ Cannot open camera.")
+            hands.close()
+            return
+
+        cap.set(cv2.CAP_PROP_BRIGHTNESS, 150)  # 增加亮度
 
     print("📷 Warming up camera...")
     for _ in range(10):
         cap.read()
     print("✅ Camera ready")
 
-    # ---------- state ----------
-    armed = "NONE"  # NONE / PINCH / TWO
-    pinch_arm_cnt = 0
-    two_arm_cnt = 0
+    budget_ms = cfg["FRAME_BUDGET_MS"]
+    if not budget_ms:
+        cam_fps = cap.get(cv2.CAP_PROP_FPS)
+        budget_ms = 1000.0 / (cam_fps if cam_fps and cam_fps > 1 else 30.0)
+    quality = None
+    if cfg["QUALITY"] == "auto":
+        quality = QualityController(budget_ms)
 
-    pinch_start_time = None
-    pinch_start_xy = None
-    dragging = False
+    recorder = None
+    if params.get("record_trace"):
+        recorder = TraceRecorder(params["record_trace"], meta={"fps": cap.get(cv2.CAP_PROP_FPS)})
 
-    prev_two_y = None
-    smooth_x = None
-    smooth_y = None
+    # ---------- state ----------
+    tracker = DetectTrackScheduler(hands, k_max=cfg["TRACK_K_MAX"],
+                                   pinch_band=(cfg["PINCH_ON"], cfg["PINCH_OFF"]))
+    lm_filter = LandmarkFilter.from_config(cfg)
+    machine = GestureMachine(cfg, screen_w, screen_h)
 
-    ignore_middle_until = 0.0
+    # gesture timing follows the source's clock when it has one (accelerated replay)
+    clock = getattr(cap, "now", None)
 
     # FPS heartbeat（确认摄像头在跑）
     frame_cnt = 0
+    total_frames = 0
     t0 = time.time()
 
     print("✅ Gesture engine running (preview OFF for stability).")
 
     try:
         while not stop_event.is_set():
+            t_start = time.perf_counter()
             ok, frame = cap.read()
             if not ok:
                 break
+            t_read = time.perf_counter()
 
             if FLIP:
                 frame = cv2.flip(frame, 1)
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = hands.process(rgb)
-            now = time.time()
+            # inference resolution (landmarks are normalized, so scaling is transparent)
+            fh, fw = frame.shape[:2]
+            if fw > settings["input_width"]:
+                ih = int(round(fh * settings["input_width"] / fw))
+                frame = cv2.resize(frame, (settings["input_width"], ih), interpolation=cv2.INTER_AREA)
+
+            t_prep = time.perf_counter()
+            lm = tracker.process(frame)
+            t_track = time.perf_counter()
+            wall = time.time()
+            now = clock() if clock is not None else wall
+            if recorder is not None:
+                recorder.add(now, lm)
+
+            if quality is not None and tracker.last_source == "detect":
+                new_settings = quality.observe(tracker.last_detect_ms, wall)
+                if new_settings is not None:
+                    settings = new_settings
+                    old_hands, hands = hands, hands_factory(settings)
+                    tracker.hands = hands
+                    tracker.reset()
+                    old_hands.close()
 
             # heartbeat
             frame_cnt += 1
-            if now - t0 >= 1.0:
+            total_frames += 1
+            if wall - t0 >= 1.0:
                 # 你想安静就把这行注释掉
                 # print(f"FPS: {frame_cnt}")
-                frame_cnt = 0
-                t0 = now
-
-            if res.multi_hand_landmarks:
-                lm = res.multi_hand_landmarks[0].landmark
-                thumb = lm[4]
-                index = lm[8]
-                middle = lm[12]
-
-                pinch_d = dist(thumb, index)
-
-                # TWO pose masked right after leaving TWO
-                if now < ignore_middle_until:
-                    two_pose = False
-                else:
-                    two_pose = two_finger_pose(lm)
-
-                # Cursor follows thumb tip
-                x = clamp(thumb.x, 0, 1)
-                y = clamp(thumb.y, 0, 1)
-
-                if smooth_x is None:
-                    smooth_x, smooth_y = x, y
-                else:
-                    a = clamp(SMOOTH_ALPHA, 0.05, 0.95)
-                    smooth_x = smooth_x * (1 - a) + x * a
-                    smooth_y = smooth_y * (1 - a) + y * a
-
-                pyautogui.moveTo(
-                    smooth_x * screen_w + OFFSET_X,
-                    smooth_y * screen_h + OFFSET_Y,
-                    duration=0
-                )
-
-                # =========== ARM stage ===========
-                if armed == "NONE":
-                    pinch_arm_cnt = pinch_arm_cnt + 1 if pinch_d < PINCH_ON else 0
-                    two_arm_cnt = two_arm_cnt + 1 if two_pose else 0
-
-                    if pinch_arm_cnt >= ARM_FRAMES:
-                        armed = "PINCH"
-                        pinch_arm_cnt = two_arm_cnt = 0
-                        pinch_start_time = now
-                        pinch_start_xy = pyautogui.position()
-                        dragging = False
-
-                    elif two_arm_cnt >= ARM_FRAMES:
-                        armed = "TWO"
-                        pinch_arm_cnt = two_arm_cnt = 0
-                        prev_two_y = None
-
-                # =========== PINCH ===========
-                elif armed == "PINCH":
-                    cur_x, cur_y = pyautogui.position()
-                    moved = math.hypot(cur_x - pinch_start_xy[0], cur_y - pinch_start_xy[1])
-
-                    if (not dragging) and (moved > DRAG_MOVE_PX or (now - pinch_start_time) > CLICK_TIME):
-                        pyautogui.mouseDown()
-                        dragging = True
-
-                    if pinch_d > PINCH_OFF:
-                        if dragging:
-                            pyautogui.mouseUp()
-                        else:
-                            pyautogui.click()
-
-                        armed = "NONE"
-                        pinch_start_time = None
-                        pinch_start_xy = None
-                        dragging = False
-                        ignore_middle_until = max(ignore_middle_until, now + 0.10)
-
-                # =========== TWO (scroll only) ===========
-                elif armed == "TWO":
-                    if not two_pose:
-                        armed = "NONE"
-                        prev_two_y = None
-                        ignore_middle_until = now + MIDDLE_IGNORE_TIME
+                if metrics is not None:
+                    metrics["fps"] = round(frame_cnt / (wall - t0), 1)
+                    metrics["frames"] = total_frames
+                    metrics["detect_ms"] = round(tracker.last_detect_ms, 2)
+                    metrics["track_k"] = tracker.k
+                    if quality is not None:
+                        metrics.update(quality.metrics())
                     else:
-                        avg_y = (index.y + middle.y) / 2.0
-                        if prev_two_y is not None:
-                            dy = avg_y - prev_two_y
-                            if abs(dy) > SCROLL_DEADZONE:
-                                pyautogui.scroll(int(-dy * SCROLL_SCALE))
-                        prev_two_y = avg_y
+                        metrics["quality"] = settings["name"]
+                frame_cnt = 0
+                t0 = wall
+
+            # short detection gaps are bridged; after that the machine is told the hand is gone
+            t_logic = time.perf_counter()
+            bridged = False
+            if lm_filter is not None:
+                lm = lm_filter.update(now, lm)
+                bridged = lm_filter.bridged
+            if lm is not None:
+                events = machine.update(now, lm, bridged=bridged)
+            else:
+                events = machine.lost(now)
+
+            t_apply = time.perf_counter()
+            for ev in events:
+                apply(ev)
+            t_bus = time.perf_counter()
+            if bus is not None:
+                bus.publish_many(events)
+
+            # per-stage time, only while a profile is running (sampling_profiler)
+            if STAGE_TIMES.active:
+                t_end = time.perf_counter()
+                detect_s = tracker.last_detect_ms / 1000.0 if tracker.last_source == "detect" else 0.0
+                STAGE_TIMES.record(**{
+                    "camera read": t_read - t_start,
+                    "flip / resize": t_prep - t_read,
+                    "mediapipe (hands.process)": detect_s,
+                    "tracker (optical flow, color convert)": t_track - t_prep - detect_s,
+                    "recorder / quality / metrics": t_logic - t_track,
+                    "gesture logic (filter + state machine)": t_apply - t_logic,
+                    "apply (pyautogui)": t_bus - t_apply,
+                    "event bus": t_end - t_bus,
+                })
 
             # ❌ 不在子线程里 imshow / waitKey（macOS 会崩）
             if show_preview:
@@ -213,10 +215,13 @@ def run_gesture(stop_event, params, show_preview=False):
                 pass
 
     finally:
-        try:
-            pyautogui.mouseUp()
-        except Exception:
-            pass
+        if apply is apply_event:
+            try:
+                _gui().mouseUp()
+            except Exception:
+                pass
         cap.release()
         hands.close()
-        print("🛑 Gesture engine stopped.")
\ No newline at end of file
+        if recorder is not None:
+            recorder.save()
+        print("🛑 Gesture engine stopped.")
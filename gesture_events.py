@@ -0,0 +1,473 @@
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+
+
+# =============================
+# Event types
+# =============================
+MOVE = "move"
+CLICK = "click"
+DRAG_START = "drag_start"
+DRAG_END = "drag_end"
+SCROLL = "scroll"
+
+EVENT_KINDS = (MOVE, CLICK, DRAG_START, DRAG_END, SCROLL)
+
+
+@dataclass(frozen=True, slots=True)
+class GestureEvent:
+    """
+    One recognized action.
+    x / y: screen pixels of the cursor when the action happened
+    amount: scroll clicks (only for SCROLL)
+    """
+    kind: str
+    t: float
+    x: float = 0.0
+    y: float = 0.0
+    amount: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+# =============================
+# Subscribers
+# =============================
+class Subscriber:
+    """
+    Base subscriber: owns a bounded buffer + its own delivery thread,
+    so a slow deliver() only delays itself.
+    When the buffer is full the oldest events are dropped.
+    """
+    def __init__(self, max_pending=1024, batch_size=64):
+        self.batch_size = max(1, int(batch_size))
+
+        self._buf = deque(maxlen=max(1, int(max_pending)))
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.batches = 0
+
+    # ---- called by the EventBus dispatcher ----
+    def _offer(self, events):
+        buf = self._buf
+        over = len(buf) + len(events) - buf.maxlen
+        if over > 0:
+            self.dropped += over
+        buf.extend(events)
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    # ---- delivery thread ----
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=0.5)
+            self._wake.clear()
+
+            buf = self._buf
+            while buf:
+                batch = []
+                while buf and len(batch) < self.batch_size:
+                    batch.append(buf.popleft())
+                try:
+                    if self.deliver(batch) is False:
+                        self.dropped += len(batch)
+                    else:
+                        self.delivered += len(batch)
+                        self.batches += 1
+                except Exception:
+                    self.errors += 1
+
+            if self._closed:
+                break
+
+    def deliver(self, batch):
+        """
+        Return False if the batch was dropped by the consumer side.
+        """
+        raise NotImplementedError
+
+    def close(self, timeout=1.0):
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "type": type(self).__name__,
+            "pending": len(self._buf),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "batches": self.batches,
+        }
+
+
+class CallbackSubscriber(Subscriber):
+    """
+    In-process callback: fn(batch) gets a list of GestureEvent
+    """
+    def __init__(self, fn, **kw):
+        super().__init__(**kw)
+        self.fn = fn
+
+    def deliver(self, batch):
+        self.fn(batch)
+
+
+class QueueSubscriber(Subscriber):
+    """
+    Puts each batch (list of GestureEvent) into a queue.Queue / multiprocessing.Queue.
+    If the consumer's queue is full, the batch is dropped instead of waiting.
+    """
+    def __init__(self, q=None, maxsize=256, **kw):
+        super().__init__(**kw)
+        if q is None:
+            import queue
+            q = queue.Queue(maxsize=maxsize)
+        self.queue = q
+
+    def deliver(self, batch):
+        try:
+            self.queue.put_nowait(batch)
+        except Exception:
+            # queue.Full / multiprocessing full
+            return False
+
+
+class SocketStream(Subscriber):
+    """
+    Local TCP stream for other applications.
+    Each event is one JSON line: {"kind": "click", "t": ..., "x": ..., "y": ..., "amount": 0}
+
+        nc 127.0.0.1 <port>
+
+    A client that cannot keep up (send timeout) is disconnected; batches sent
+    while no client is connected count as dropped.
+    send_buffer: kernel send buffer per client (bytes, None = OS default);
+    smaller => a stalled client is detected after less buffered data.
+    """
+    def __init__(self, host="127.0.0.1", port=0, send_timeout=0.2, send_buffer=None, **kw):
+        super().__init__(**kw)
+        self.send_timeout = float(send_timeout)
+        self.send_buffer = send_buffer
+        self.disconnects = 0
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, int(port)))
+        self._server.listen(8)
+        self._server.settimeout(0.5)
+        self.address = self._server.getsockname()
+
+        self._clients = []
+        self._clients_lock = threading.Lock()
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(self.send_timeout)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.send_buffer:
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, int(self.send_buffer))
+            with self._clients_lock:
+                self._clients.append(conn)
+
+    def deliver(self, batch):
+        with self._clients_lock:
+            clients = list(self._clients)
+        if not clients:
+            return False
+
+        data = "".join(json.dumps(ev.to_dict()) + "\n" for ev in batch).encode("utf-8")
+        dead = []
+        for c in clients:
+            try:
+                c.sendall(data)
+            except OSError:
+                dead.append(c)
+
+        if dead:
+            with self._clients_lock:
+                for c in dead:
+                    if c in self._clients:
+                        self._clients.remove(c)
+                        self.disconnects += 1
+                    try:
+                        c.close()
+                    except OSError:
+                        pass
+        return len(dead) < len(clients)
+
+    @property
+    def clients(self):
+        with self._clients_lock:
+            return len(self._clients)
+
+    def stats(self):
+        st = super().stats()
+        st["clients"] = self.clients
+        st["disconnects"] = self.disconnects
+        return st
+
+    def close(self, timeout=1.0):
+        super().close(timeout)
+        try:
+            self._server.close()
+        except OSError:
+            pass
+        with self._clients_lock:
+            for c in self._clients:
+                try:
+                    c.close()
+                except OSError:
+                    pass
+            self._clients = []
+
+
+# =============================
+# Bus
+# =============================
+class EventBus:
+    """
+    Fan-out of GestureEvent to subscribers.
+
+    publish() / publish_many() only append to one ingress deque, so the
+    gesture loop pays O(1) per frame regardless of the number of subscribers.
+    A dispatcher thread collects events for flush_interval seconds and hands
+    each subscriber one batch; every subscriber delivers on its own thread.
+    """
+    def __init__(self, flush_interval=0.01):
+        self.flush_interval = float(flush_interval)
+
+        self._subs = ()
+        self._lock = threading.Lock()
+        self._ingress = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+        self.published = 0
+
+    def subscribe(self, sub):
+        with self._lock:
+            if sub not in self._subs:
+                self._subs = self._subs + (sub,)
+        sub._start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+        sub.close()
+
+    def publish(self, event):
+        self.publish_many((event,))
+
+    def publish_many(self, events):
+        if not events or not self._subs:
+            return
+        self.published += len(events)
+        self._ingress.extend(events)
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def _dispatch(self):
+        ingress = self._ingress
+        while True:
+            self._wake.wait(timeout=0.5)
+            self._wake.clear()
+            if self.flush_interval > 0 and not self._closed:
+                # 稍等一下，把更多事件攒成一批
+                time.sleep(self.flush_interval)
+
+            batch = []
+            while ingress:
+                batch.append(ingress.popleft())
+            if batch:
+                # tuple swap on (un)subscribe => no lock needed here
+                for sub in self._subs:
+                    sub._offer(batch)
+
+            if self._closed:
+                break
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join(1.0)
+        with self._lock:
+            subs, self._subs = self._subs, ()
+        for sub in subs:
+            sub.close()
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "pending": len(self._ingress),
+            "subscribers": [s.stats() for s in self._subs],
+        }
+
+
+# =============================
+# Load test
+# =============================
+def _percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def load_test(n_subscribers=200, frames=600, events_per_frame=3,
+              slow_every=10, slow_delay=0.05, fps=60,
+              max_publish_p99_us=1000.0, socket_buffer=8192):
+    """
+    Many subscribers: fast callbacks, deliberately slow callbacks,
+    queues nobody reads (they fill up and drop) and a socket client that never reads.
+    Reports publish-side cost per frame (what the gesture loop pays)
+    and how much each kind of subscriber received / dropped.
+
+    Pass / fail:
+    - publish p99 <= max_publish_p99_us (the loop never waits for subscribers)
+    - every fast callback got every event, nothing dropped
+    - the socket client that never reads was disconnected once its buffers filled
+      (socket_buffer shrinks the kernel buffers on both ends so this happens
+      within a normal run instead of after megabytes)
+
+    Returns (ok, report_dict).
+    """
+    import queue
+
+    if frames <= 0 or events_per_frame <= 0:
+        print("⚠️  Nothing to publish (frames and events_per_frame must be > 0)")
+        return False, {}
+
+    bus = EventBus()
+    roles = []  # (role, subscriber)
+
+    for i in range(n_subscribers):
+        if slow_every and i % slow_every == 0:
+            roles.append(("slow callback", CallbackSubscriber(lambda batch: time.sleep(slow_delay))))
+        elif i % 3 == 0:
+            roles.append(("unread queue", QueueSubscriber(queue.Queue(maxsize=64))))
+        else:
+            roles.append(("fast callback", CallbackSubscriber(lambda batch: None)))
+
+    # one socket stream with a connected client that never reads
+    server = SocketStream(port=0, send_buffer=socket_buffer)
+    roles.append(("socket (no reader)", server))
+    for _, sub in roles:
+        bus.subscribe(sub)
+    lazy_client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    lazy_client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, socket_buffer)
+    lazy_client.connect(server.address)
+    deadline = time.perf_counter() + 2.0
+    while server.clients == 0 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    publish_us = []
+    sent_bytes = 0
+    frame_dt = 1.0 / fps if fps else 0.0
+    t_start = time.perf_counter()
+    for f in range(frames):
+        now = time.time()
+        events = [GestureEvent(MOVE, now, f, f) for _ in range(events_per_frame - 1)]
+        events.append(GestureEvent(SCROLL, now, f, f, amount=1))
+
+        t0 = time.perf_counter()
+        bus.publish_many(events)
+        publish_us.append((time.perf_counter() - t0) * 1e6)
+        sent_bytes += sum(len(json.dumps(ev.to_dict())) + 1 for ev in events)
+
+        if frame_dt:
+            time.sleep(frame_dt)
+    wall = time.perf_counter() - t_start
+
+    bus.close()
+    lazy_client.close()
+
+    total = bus.published
+    by_role = {}
+    for role, sub in roles:
+        st = sub.stats()
+        d = by_role.setdefault(role, {"n": 0, "delivered": 0, "dropped": 0, "errors": 0,
+                                      "min_delivered": total})
+        d["n"] += 1
+        d["delivered"] += st["delivered"]
+        d["dropped"] += st["dropped"]
+        d["errors"] += st["errors"]
+        d["min_delivered"] = min(d["min_delivered"], st["delivered"])
+
+    p99 = _percentile(publish_us, 99)
+    print(f"subscribers={len(roles)} frames={frames} events/frame={events_per_frame}")
+    print(f"loop wall time: {wall:.3f}s  ({frames / wall:.0f} frames/s)")
+    print(f"publish per frame: p50={_percentile(publish_us, 50):.1f}us "
+          f"p99={p99:.1f}us max={max(publish_us):.1f}us")
+    for role, d in by_role.items():
+        print(f"  {role:<20} n={d['n']:<4} delivered/sub={d['delivered'] / d['n'] / total:6.1%} "
+              f"dropped={d['dropped']} errors={d['errors']}")
+    print(f"  socket disconnects={server.disconnects}")
+
+    checks = [
+        (f"publish p99 {p99:.0f}us <= {max_publish_p99_us:.0f}us", p99 <= max_publish_p99_us),
+    ]
+    fast = by_role.get("fast callback")
+    if fast is not None:
+        checks.append(("fast callbacks got every event",
+                       fast["min_delivered"] == total and fast["dropped"] == 0 and fast["errors"] == 0))
+    # both kernel buffers (Linux doubles the requested size) + what is in flight
+    if sent_bytes > 8 * socket_buffer:
+        checks.append((f"stalled socket client disconnected ({server.disconnects})", server.disconnects >= 1))
+    else:
+        print(f"  (socket stall not checked: only {sent_bytes} bytes sent, run more frames)")
+
+    ok = True
+    for name, passed in checks:
+        print(f"  {'✅' if passed else '❌'} {name}")
+        ok = ok and passed
+    print("✅ Load test passed" if ok else "❌ Load test failed")
+
+    return ok, {"publish_us": publish_us, "wall": wall, "by_role": by_role,
+                "socket": server.stats(), "checks": checks}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Gesture event bus load test")
+    ap.add_argument("--subscribers", type=int, default=200)
+    ap.add_argument("--frames", type=int, default=600)
+    ap.add_argument("--events-per-frame", type=int, default=3)
+    ap.add_argument("--fps", type=float, default=60, help="0 = as fast as possible")
+    ap.add_argument("--max-publish-p99-us", type=float, default=1000.0)
+    args = ap.parse_args()
+
+    ok, _ = load_test(args.subscribers, args.frames, args.events_per_frame, fps=args.fps,
+                      max_publish_p99_us=args.max_publish_p99_us)
+    sys.exit(0 if ok else 1)
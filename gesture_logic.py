@@ -0,0 +1,289 @@
+import math
+
+from gesture_events import GestureEvent, MOVE, CLICK, DRAG_START, DRAG_END, SCROLL
+from pinch_predictor import PinchPredictor
+
+
+class Landmark:
+    """
+    Same fields as a MediaPipe NormalizedLandmark (x / y normalized to [0, 1]);
+    used for landmarks that did not come straight from MediaPipe
+    (optical flow, temporal filter, recorded traces)
+    """
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+def clamp(v, lo, hi):
+    return max(lo, min(hi, v))
+
+
+def dist(a, b):
+    return math.hypot(a.x - b.x, a.y - b.y)
+
+
+def finger_extended_y(lm, tip, pip, mcp):
+    return (lm[tip].y < lm[pip].y) and (lm[pip].y < lm[mcp].y)
+
+
+def two_finger_pose(lm):
+    idx_ok = finger_extended_y(lm, 8, 6, 5)
+    mid_ok = finger_extended_y(lm, 12, 10, 9)
+    return idx_ok and mid_ok
+
+
+def palm_size(lm):
+    # wrist -> middle finger MCP, does not change with pinch / finger pose
+    return dist(lm[0], lm[9])
+
+
+# PINCH_OFF - PINCH_ON: release hysteresis
+PINCH_HYSTERESIS = 0.020
+
+
+def engine_config(params):
+    """
+    map user params (UI sliders) -> engine constants
+    Upper-case keys override a constant directly; unknown ones raise ValueError.
+    """
+    cfg = {}
+    cfg["SMOOTH_ALPHA"] = float(params.get("smooth", 0.35))
+
+    # whole-hand temporal filter (One Euro over all 21 points) + dropout bridging
+    cfg["LANDMARK_FILTER"] = bool(params.get("landmark_filter", True))
+    cfg["FILTER_MIN_CUTOFF"] = 0.05
+    cfg["FILTER_BETA"] = 80.0
+    cfg["BRIDGE_TIME"] = float(params.get("bridge_ms", 200)) / 1000.0
+    # hand gone (after bridging) this long => release drag / disarm
+    cfg["LOST_RELEASE_TIME"] = float(params.get("lost_release_ms", 500)) / 1000.0
+
+    click_sens = float(params.get("click_sens", 0.6))
+    # click_sens 越大 => 更容易判定 pinch
+    pinch_on = 0.030 + (click_sens - 0.3) * (0.050 - 0.030) / (1.0 - 0.3)
+    cfg["PINCH_ON"] = clamp(pinch_on, 0.028, 0.060)
+    cfg["PINCH_OFF"] = cfg["PINCH_ON"] + PINCH_HYSTERESIS
+
+    cfg["CLICK_TIME"] = float(params.get("drag_delay_ms", 160)) / 1000.0
+
+    arm_frames = int(round(6 - (click_sens - 0.3) * (6 - 3) / (1.0 - 0.3)))
+    cfg["ARM_FRAMES"] = max(2, min(8, arm_frames))
+
+    cfg["DRAG_MOVE_PX"] = 15
+
+    # predictive pinch: start the pinch on a decisive closing motion instead of
+    # waiting ARM_FRAMES; clicks still need the distance to really reach PINCH_ON
+    cfg["PREDICTIVE_PINCH"] = bool(params.get("predictive_pinch", True))
+    cfg["PINCH_LEAD"] = float(params.get("pinch_lead", 0.25))
+    cfg["PINCH_SPEED"] = float(params.get("pinch_speed", 1.5))  # palm sizes / s
+    cfg["PINCH_CONFIRM_TIME"] = 0.15
+
+    cfg["SCROLL_SCALE"] = int(params.get("scroll_speed", 500))
+    cfg["SCROLL_DEADZONE"] = 0.004
+
+    cfg["MIDDLE_IGNORE_TIME"] = 0.28
+    cfg["OFFSET_X"] = -20
+    cfg["OFFSET_Y"] = 0
+    cfg["FLIP"] = True
+
+    # detect-then-track: MediaPipe at most every TRACK_K_MAX frames (1 = every frame);
+    # off by default until it has been measured on real clips (python hand_tracker.py <clips>)
+    cfg["TRACK_K_MAX"] = max(1, int(params.get("track_k_max", 1)))
+
+    # camera mode negotiation (cached per device after the first probe)
+    cfg["CAMERA_PROBE"] = bool(params.get("camera_probe", True))
+    cfg["CAMERA_REPROBE"] = bool(params.get("camera_reprobe", False))
+
+    # adaptive MediaPipe quality: "auto" or a fixed level index into QUALITY_LEVELS
+    cfg["QUALITY"] = params.get("quality", "auto")
+    cfg["FRAME_BUDGET_MS"] = params.get("frame_budget_ms")  # None => 1000 / camera FPS
+
+    # raw overrides, e.g. {"PINCH_ON": 0.045, "ARM_FRAMES": 4} (scorecard / grid search)
+    for k, v in params.items():
+        if k.isupper():
+            if k not in cfg:
+                raise ValueError(f"Unknown engine constant {k!r}")
+            cfg[k] = v
+    # PINCH_ON overridden alone => PINCH_OFF follows, so the hysteresis stays intact
+    if "PINCH_ON" in params and "PINCH_OFF" not in params:
+        cfg["PINCH_OFF"] = cfg["PINCH_ON"] + PINCH_HYSTERESIS
+    if cfg["PINCH_OFF"] <= cfg["PINCH_ON"]:
+        raise ValueError(f"PINCH_OFF ({cfg['PINCH_OFF']}) must be above PINCH_ON ({cfg['PINCH_ON']})")
+    return cfg
+
+
+class GestureMachine:
+    """
+    NONE / PINCH / TWO intent state machine.
+    update(now, lm) takes one frame of landmarks and returns a list of GestureEvent;
+    it never touches pyautogui, so the same logic can be replayed or streamed.
+
+    bridged=True marks landmarks extrapolated during a detection gap
+    (LandmarkFilter.bridged): they only move the cursor, the gesture state is held.
+    """
+    def __init__(self, cfg, screen_w, screen_h):
+        self.cfg = cfg
+        self.screen_w = screen_w
+        self.screen_h = screen_h
+
+        self.armed = "NONE"  # NONE / PINCH / TWO
+        self.pinch_arm_cnt = 0
+        self.two_arm_cnt = 0
+
+        self.pinch_start_time = None
+        self.pinch_start_xy = None
+        self.pinch_confirmed = False
+        self.dragging = False
+
+        self.pinch_pred = None
+        if cfg.get("PREDICTIVE_PINCH"):
+            self.pinch_pred = PinchPredictor(
+                cfg["PINCH_ON"], cfg["PINCH_OFF"],
+                lead=cfg["PINCH_LEAD"], min_speed=cfg["PINCH_SPEED"],
+            )
+
+        self.prev_two_y = None
+        self.smooth_x = None
+        self.smooth_y = None
+        self.cursor_xy = (0.0, 0.0)
+
+        self.ignore_middle_until = 0.0
+        self.lost_since = None
+
+    def lost(self, now):
+        """
+        No hand in this frame (bridging already gave up).
+        After LOST_RELEASE_TIME a drag is released and any armed gesture cancelled,
+        so the mouse button can never stay down while the hand is out of view.
+        """
+        if self.lost_since is None:
+            self.lost_since = now
+        if self.armed == "NONE" or now - self.lost_since < self.cfg["LOST_RELEASE_TIME"]:
+            self.pinch_arm_cnt = self.two_arm_cnt = 0
+            return []
+
+        events = []
+        if self.dragging:
+            events.append(GestureEvent(DRAG_END, now, *self.cursor_xy))
+
+        self.armed = "NONE"
+        self.pinch_arm_cnt = self.two_arm_cnt = 0
+        self.pinch_start_time = None
+        self.pinch_start_xy = None
+        self.pinch_confirmed = False
+        self.dragging = False
+        self.prev_two_y = None
+        return events
+
+    def update(self, now, lm, bridged=False):
+        c = self.cfg
+        events = []
+        self.lost_since = None
+
+        thumb = lm[4]
+        index = lm[8]
+        middle = lm[12]
+
+        # Cursor follows thumb tip
+        x = clamp(thumb.x, 0, 1)
+        y = clamp(thumb.y, 0, 1)
+
+        if self.smooth_x is None:
+            self.smooth_x, self.smooth_y = x, y
+        else:
+            a = clamp(c["SMOOTH_ALPHA"], 0.05, 0.95)
+            self.smooth_x = self.smooth_x * (1 - a) + x * a
+            self.smooth_y = self.smooth_y * (1 - a) + y * a
+
+        # pyautogui 会把坐标夹在屏幕内，这里保持一致
+        cx = clamp(self.smooth_x * self.screen_w + c["OFFSET_X"], 0, self.screen_w - 1)
+        cy = clamp(self.smooth_y * self.screen_h + c["OFFSET_Y"], 0, self.screen_h - 1)
+        self.cursor_xy = (cx, cy)
+        events.append(GestureEvent(MOVE, now, cx, cy))
+
+        # 推算出来的点不能触发任何动作：不计数、不确认 pinch、不按下鼠标
+        if bridged:
+            return events
+
+        pinch_d = dist(thumb, index)
+        pred = self.pinch_pred
+        if pred is not None:
+            pred.update(now, pinch_d, palm_size(lm))
+
+        # TWO pose masked right after leaving TWO
+        if now < self.ignore_middle_until:
+            two_pose = False
+        else:
+            two_pose = two_finger_pose(lm)
+
+        # =========== ARM stage ===========
+        if self.armed == "NONE":
+            self.pinch_arm_cnt = self.pinch_arm_cnt + 1 if pinch_d < c["PINCH_ON"] else 0
+            self.two_arm_cnt = self.two_arm_cnt + 1 if two_pose else 0
+
+            predicted = pred is not None and pred.onset(pinch_d)
+
+            if self.pinch_arm_cnt >= c["ARM_FRAMES"] or predicted:
+                self.armed = "PINCH"
+                self.pinch_arm_cnt = self.two_arm_cnt = 0
+                self.pinch_start_time = now
+                self.pinch_start_xy = self.cursor_xy
+                self.pinch_confirmed = pinch_d < c["PINCH_ON"]
+                self.dragging = False
+
+            elif self.two_arm_cnt >= c["ARM_FRAMES"]:
+                self.armed = "TWO"
+                self.pinch_arm_cnt = self.two_arm_cnt = 0
+                self.prev_two_y = None
+
+        # =========== PINCH ===========
+        elif self.armed == "PINCH":
+            # predicted onset: nothing is emitted until the fingers really close;
+            # CLICK_TIME / DRAG_MOVE_PX count from contact, not from the prediction
+            if not self.pinch_confirmed and pinch_d < c["PINCH_ON"]:
+                self.pinch_confirmed = True
+                self.pinch_start_time = now
+                self.pinch_start_xy = self.cursor_xy
+
+            moved = math.hypot(cx - self.pinch_start_xy[0], cy - self.pinch_start_xy[1])
+
+            if (self.pinch_confirmed and not self.dragging
+                    and (moved > c["DRAG_MOVE_PX"] or (now - self.pinch_start_time) > c["CLICK_TIME"])):
+                events.append(GestureEvent(DRAG_START, now, cx, cy))
+                self.dragging = True
+
+            released = pinch_d > c["PINCH_OFF"] or (
+                self.pinch_confirmed and pred is not None and pred.release(pinch_d))
+            expired = (not self.pinch_confirmed) and (now - self.pinch_start_time) > c["PINCH_CONFIRM_TIME"]
+
+            if released or expired:
+                if self.dragging:
+                    events.append(GestureEvent(DRAG_END, now, cx, cy))
+                elif self.pinch_confirmed:
+                    events.append(GestureEvent(CLICK, now, cx, cy))
+
+                self.armed = "NONE"
+                self.pinch_start_time = None
+                self.pinch_start_xy = None
+                self.pinch_confirmed = False
+                self.dragging = False
+                self.ignore_middle_until = max(self.ignore_middle_until, now + 0.10)
+
+        # =========== TWO (scroll only) ===========
+        elif self.armed == "TWO":
+            if not two_pose:
+                self.armed = "NONE"
+                self.prev_two_y = None
+                self.ignore_middle_until = now + c["MIDDLE_IGNORE_TIME"]
+            else:
+                avg_y = (index.y + middle.y) / 2.0
+                if self.prev_two_y is not None:
+                    dy = avg_y - self.prev_two_y
+                    if abs(dy) > c["SCROLL_DEADZONE"]:
+                        events.append(GestureEvent(SCROLL, now, cx, cy, amount=int(-dy * c["SCROLL_SCALE"])))
+                self.prev_two_y = avg_y
+
+        return events
@@ -0,0 +1,287 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+from gesture_logic import Landmark
+
+
+class DetectTrackScheduler:
+    """
+    Detect-then-track:
+    - run MediaPipe (hands.process) only every k frames
+    - in between, move the 21 landmarks with sparse optical flow (Lucas-Kanade)
+    - k adapts: fast motion / large flow error => detect more often,
+      calm hand + clean flow => detect less often (up to k_max)
+    - if too few points survive the forward-backward check, detect right away
+    - the fingertips that decide gestures (tip_points) are never moved with the
+      whole-hand shift: if one of them fails the check, detect right away
+    - pinch_band=(PINCH_ON, PINCH_OFF): while the thumb-index distance is below
+      PINCH_OFF (pinch band or closer, where click / drag / release are decided)
+      every frame goes to MediaPipe
+
+    k_max=1 turns it into plain "MediaPipe every frame".
+    """
+    def __init__(self, hands, k_min=1, k_max=4,
+                 fb_max_px=2.0, min_good_ratio=0.7,
+                 motion_fast=0.08, motion_slow=0.02, err_bad_px=1.0,
+                 drift_bad=0.06, tip_points=(4, 8, 12), pinch_band=None):
+        self.hands = hands
+        self.k_min = max(1, int(k_min))
+        self.k_max = max(self.k_min, int(k_max))
+
+        self.fb_max_px = fb_max_px            # forward-backward error per point (px)
+        self.min_good_ratio = min_good_ratio  # below this => re-detect now
+        self.motion_fast = motion_fast        # per-frame motion / palm size
+        self.motion_slow = motion_slow
+        self.err_bad_px = err_bad_px          # median fb error that counts as "poor tracking"
+        self.drift_bad = drift_bad            # tracked vs fresh MediaPipe landmarks / palm size
+        self.tip_points = tuple(tip_points)
+        self.pinch_band = pinch_band
+
+        self.lk_params = dict(
+            winSize=(21, 21),
+            maxLevel=3,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        )
+
+        self.k = self.k_min
+        self.reset()
+
+        # stats
+        self.detect_frames = 0
+        self.track_frames = 0
+        self.last_source = None  # "detect" / "track" / None
+        self.last_detect_ms = 0.0
+
+    def reset(self):
+        self.prev_gray = None
+        self.pts = None      # (21, 1, 2) float32, pixels
+        self.z = None
+        self.since_detect = 0
+        self.pinch_d = None  # thumb-index distance (normalized) of the last output
+
+    # ---------- MediaPipe pass ----------
+    def _detect(self, frame, gray):
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t0 = time.perf_counter()
+        res = self.hands.process(rgb)
+        self.last_detect_ms = (time.perf_counter() - t0) * 1000.0
+        self.detect_frames += 1
+        old_pts, tracked = self.pts, self.since_detect
+        self.since_detect = 0
+        self.last_source = "detect"
+
+        if not res.multi_hand_landmarks:
+            self.reset()
+            return None
+
+        lm = res.multi_hand_landmarks[0].landmark
+        h, w = gray.shape[:2]
+        pts = np.array([[[p.x * w, p.y * h]] for p in lm], dtype=np.float32)
+
+        if old_pts is not None:
+            p = pts.reshape(-1, 2)
+            palm_px = max(1.0, float(np.linalg.norm(p[0] - p[9])))
+            delta = float(np.median(np.linalg.norm((pts - old_pts).reshape(-1, 2), axis=1))) / palm_px
+            if tracked:
+                # how far optical flow drifted from MediaPipe
+                if delta > self.drift_bad:
+                    self.k = max(self.k_min, self.k - 1)
+                elif delta < self.drift_bad * 0.5:
+                    self.k = min(self.k_max, self.k + 1)
+            else:
+                # two MediaPipe passes in a row: delta is the per-frame motion
+                self._adapt(delta, 0.0)
+
+        self.pts = pts
+        self.z = [p.z for p in lm]
+        self.prev_gray = gray
+        self.pinch_d = self._pinch_d(pts, gray)
+        return lm
+
+    # ---------- optical flow pass ----------
+    def _track(self, gray):
+        p0 = self.pts
+        p1, st1, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, p0, None, **self.lk_params)
+        if p1 is None:
+            return None
+        p0r, st2, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, p1, None, **self.lk_params)
+        if p0r is None:
+            return None
+
+        fb = np.linalg.norm((p0 - p0r).reshape(-1, 2), axis=1)
+        good = (st1.reshape(-1) == 1) & (st2.reshape(-1) == 1) & (fb < self.fb_max_px)
+        if good.mean() < self.min_good_ratio:
+            return None
+        # a lost fingertip would be moved with the whole hand => frozen pinch distance
+        if not good[list(self.tip_points)].all():
+            return None
+
+        d = (p1 - p0).reshape(-1, 2)
+        shift = np.median(d[good], axis=0)
+        # 丢失的点跟着整只手平移
+        p1 = p1.reshape(-1, 2)
+        p1[~good] = p0.reshape(-1, 2)[~good] + shift
+        p1 = p1.reshape(-1, 1, 2).astype(np.float32)
+
+        pts = p0.reshape(-1, 2)
+        palm_px = max(1.0, float(np.linalg.norm(pts[0] - pts[9])))
+        motion = float(np.median(np.linalg.norm(d[good], axis=1))) / palm_px
+        err = float(np.median(fb[good]))
+        return p1, motion, err
+
+    def _adapt(self, motion, err):
+        if motion > self.motion_fast or err > self.err_bad_px:
+            self.k = max(self.k_min, self.k - 1)
+        elif motion < self.motion_slow and err < self.err_bad_px * 0.5:
+            self.k = min(self.k_max, self.k + 1)
+
+    @staticmethod
+    def _pinch_d(pts, gray):
+        # same units as gesture_logic.dist (normalized x / y)
+        h, w = gray.shape[:2]
+        p = pts.reshape(-1, 2)
+        return float(np.hypot((p[4][0] - p[8][0]) / w, (p[4][1] - p[8][1]) / h))
+
+    def _near_pinch(self):
+        return self.pinch_band is not None and self.pinch_d is not None and self.pinch_d < self.pinch_band[1]
+
+    def process(self, frame):
+        """
+        frame: BGR image
+        returns 21 landmarks (MediaPipe or Landmark) or None
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.pts is None or self.since_detect + 1 >= self.k or self._near_pinch():
+            return self._detect(frame, gray)
+
+        tracked = self._track(gray)
+        if tracked is None:
+            # tracking quality dropped => detect on this frame
+            self.k = self.k_min
+            return self._detect(frame, gray)
+
+        p1, motion, err = tracked
+        self._adapt(motion, err)
+
+        self.pts = p1
+        self.prev_gray = gray
+        self.pinch_d = self._pinch_d(p1, gray)
+        self.since_detect += 1
+        self.track_frames += 1
+        self.last_source = "track"
+
+        h, w = gray.shape[:2]
+        return [Landmark(float(p[0][0]) / w, float(p[0][1]) / h, z)
+                for p, z in zip(p1, self.z)]
+
+
+# =============================
+# Benchmark on recorded clips
+# =============================
+def _run_clip(path, make_hands, k_max, max_frames, flip, pinch_band=None):
+    cap = cv2.VideoCapture(path)
+    hands = make_hands()
+    sched = DetectTrackScheduler(hands, k_max=k_max, pinch_band=pinch_band)
+    out = []
+    busy = 0.0
+    try:
+        while len(out) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if flip:
+                frame = cv2.flip(frame, 1)
+            t0 = time.perf_counter()
+            lm = sched.process(frame)
+            busy += time.perf_counter() - t0
+            out.append(None if lm is None else [(p.x, p.y) for p in lm])
+    finally:
+        cap.release()
+        hands.close()
+    return out, busy, sched
+
+
+def benchmark(paths, k_values=(1, 2, 3, 4, 6), max_frames=3000, flip=True):
+    """
+    For each clip: MediaPipe-every-frame is the reference (k_max=1).
+    error = mean landmark distance to the reference, in palm sizes;
+    pinch = mean |thumb-index distance - reference| (PINCH_ON is ~0.04).
+    Trackers use the engine's default pinch band, like run_gesture.
+    """
+    import mediapipe as mp
+    from gesture_logic import engine_config
+
+    cfg = engine_config({})
+    band = (cfg["PINCH_ON"], cfg["PINCH_OFF"])
+
+    def make_hands():
+        return mp.solutions.hands.Hands(
+            max_num_hands=1,
+            min_detection_confidence=0.6,
+            min_tracking_confidence=0.6,
+        )
+
+    rows = []
+    for path in paths:
+        ref, ref_busy, _ = _run_clip(path, make_hands, 1, max_frames, flip)
+        n = len(ref)
+        if n == 0:
+            print(f"⚠️  {path}: no frames")
+            continue
+
+        for k in k_values:
+            if k == 1:
+                got, busy, sched = ref, ref_busy, None
+            else:
+                got, busy, sched = _run_clip(path, make_hands, k, max_frames, flip, band)
+
+            errs = []
+            pinch_errs = []
+            lost = 0
+            for r, g in zip(ref, got):
+                if r is None:
+                    continue
+                if g is None:
+                    lost += 1
+                    continue
+                ps = max(1e-6, ((r[0][0] - r[9][0]) ** 2 + (r[0][1] - r[9][1]) ** 2) ** 0.5)
+                e = sum(((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 for a, b in zip(r, g)) / 21.0
+                errs.append(e / ps)
+                pinch_errs.append(abs(math.dist(r[4], r[8]) - math.dist(g[4], g[8])))
+
+            errs.sort()
+            with_hand = sum(1 for r in ref if r is not None)
+            detect_ratio = 1.0 if sched is None else sched.detect_frames / max(1, n)
+            rows.append({
+                "clip": path,
+                "k_max": k,
+                "fps": n / busy if busy > 0 else 0.0,
+                "detect_ratio": detect_ratio,
+                "err_mean": sum(errs) / len(errs) if errs else 0.0,
+                "err_p95": errs[int(0.95 * (len(errs) - 1))] if errs else 0.0,
+                "pinch_err": sum(pinch_errs) / len(pinch_errs) if pinch_errs else 0.0,
+                "lost": lost / max(1, with_hand),
+            })
+
+    print(f"{'clip':<28} {'k_max':>5} {'fps':>7} {'detect%':>8} {'err(palm)':>10} {'p95':>7} {'pinch':>7} {'lost%':>6}")
+    for r in rows:
+        print(f"{r['clip'][-28:]:<28} {r['k_max']:>5} {r['fps']:>7.1f} {r['detect_ratio']:>8.1%} "
+              f"{r['err_mean']:>10.3f} {r['err_p95']:>7.3f} {r['pinch_err']:>7.4f} {r['lost']:>6.1%}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Detect-then-track accuracy vs speed on recorded clips")
+    ap.add_argument("clips", nargs="+", help="video files (e.g. recorded with the webcam)")
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 2, 3, 4, 6])
+    ap.add_argument("--max-frames", type=int, default=3000)
+    ap.add_argument("--no-flip", action="store_true")
+    args = ap.parse_args()
+
+    benchmark(args.clips, tuple(args.k), args.max_frames, flip=not args.no_flip)
@@ -0,0 +1,90 @@
+import math
+
+from gesture_logic import Landmark
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class LandmarkFilter:
+    """
+    Temporal filter over all 21 landmarks (x, y, z) at once.
+
+    - One Euro filter per coordinate: strong smoothing when the hand is still,
+      little lag when it moves (same defaults as MediaPipe's landmark smoothing)
+    - detection dropout: for up to bridge_time after the last real frame the
+      landmarks are extrapolated with the filtered velocity (at most
+      max_extrapolate seconds ahead), after that update() returns None
+
+    update(now, lm) -> filtered / bridged landmarks, or None when the hand is gone.
+    .bridged is True while the returned landmarks are extrapolated; pass it on to
+    GestureMachine.update so they can move the cursor but not trigger actions.
+    """
+    def __init__(self, min_cutoff=0.05, beta=80.0, d_cutoff=1.0,
+                 bridge_time=0.2, max_extrapolate=0.1):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.bridge_time = bridge_time
+        self.max_extrapolate = max_extrapolate
+        self.reset()
+
+    @classmethod
+    def from_config(cls, cfg):
+        if not cfg.get("LANDMARK_FILTER"):
+            return None
+        return cls(
+            min_cutoff=cfg["FILTER_MIN_CUTOFF"],
+            beta=cfg["FILTER_BETA"],
+            bridge_time=cfg["BRIDGE_TIME"],
+        )
+
+    def reset(self):
+        self.x = None   # filtered values, 63 = 21 * (x, y, z)
+        self.dx = None  # filtered derivatives
+        self.last_t = None
+        self.bridged = False
+
+    def update(self, now, lm):
+        if lm is None:
+            return self._bridge(now)
+
+        raw = []
+        for p in lm:
+            raw.extend((p.x, p.y, p.z))
+
+        if self.x is None or now - self.last_t > self.bridge_time or now <= self.last_t:
+            self.x = raw
+            self.dx = [0.0] * len(raw)
+        else:
+            dt = now - self.last_t
+            a_d = _alpha(self.d_cutoff, dt)
+            x, dx = self.x, self.dx
+            for i, v in enumerate(raw):
+                d = dx[i] + a_d * ((v - x[i]) / dt - dx[i])
+                a = _alpha(self.min_cutoff + self.beta * abs(d), dt)
+                dx[i] = d
+                x[i] = x[i] + a * (v - x[i])
+
+        self.last_t = now
+        self.bridged = False
+        return self._points(0.0)
+
+    def _bridge(self, now):
+        if self.x is None:
+            return None
+        gap = now - self.last_t
+        if gap > self.bridge_time:
+            self.reset()
+            return None
+        self.bridged = True
+        return self._points(min(gap, self.max_extrapolate))
+
+    def _points(self, ahead):
+        x, dx = self.x, self.dx
+        return [
+            Landmark(x[i] + dx[i] * ahead, x[i + 1] + dx[i + 1] * ahead, x[i + 2] + dx[i + 2] * ahead)
+            for i in range(0, len(x), 3)
+        ]
@@ -0,0 +1,250 @@
+import json
+
+from gesture_events import CLICK, DRAG_START, DRAG_END, SCROLL
+from gesture_logic import GestureMachine, Landmark
+from landmark_filter import LandmarkFilter
+
+
+# =============================
+# Trace format (JSON)
+# =============================
+# {
+#   "version": 1,
+#   "meta":   {"fps": 30, "note": "..."},
+#   "frames": [{"t": 0.033, "lm": [[x, y, z], ... 21 points]}, {"t": 0.066, "lm": null}, ...],
+#   "spans":  [{"kind": "click", "start": 1.20, "end": 1.32}, ...]
+# }
+#
+# t: seconds, lm: MediaPipe normalized landmarks (already mirrored like the engine sees them),
+# null = no hand detected in that frame.
+# spans: what the user intended (annotated by hand):
+#   click  - fingers touching, from first contact to release
+#   drag   - from pinch to release
+#   scroll - two-finger pose moving
+#
+# A labeled corpus is simply a directory of such files (see scorecard.py).
+TRACE_VERSION = 1
+SPAN_KINDS = ("click", "drag", "scroll")
+
+
+class TraceRecorder:
+    """
+    Collects landmarks from a live session (run_gesture(params={"record_trace": path}))
+    """
+    def __init__(self, path, meta=None):
+        self.path = path
+        self.meta = dict(meta or {})
+        self.frames = []
+
+    def add(self, t, lm):
+        self.frames.append({
+            "t": round(t, 4),
+            "lm": None if lm is None else [[round(p.x, 5), round(p.y, 5), round(p.z, 5)] for p in lm],
+        })
+
+    def save(self, spans=()):
+        save_trace(self.path, self.frames, spans, self.meta)
+        print(f"💾 Trace saved: {self.path} ({len(self.frames)} frames)")
+
+
+def save_trace(path, frames, spans=(), meta=None):
+    t0 = frames[0]["t"] if frames else 0.0
+    data = {
+        "version": TRACE_VERSION,
+        "meta": dict(meta or {}),
+        # 时间从 0 开始，方便人工标注 spans
+        "frames": [{"t": round(f["t"] - t0, 4), "lm": f["lm"]} for f in frames],
+        "spans": list(spans),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def load_trace(path):
+    """
+    Returns {"meta", "frames": [(t, [Landmark]*21 or None)], "spans": [...], "path"}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    frames = []
+    for fr in data.get("frames", []):
+        lm = fr.get("lm")
+        if lm is not None:
+            lm = [Landmark(*p) for p in lm]
+        frames.append((float(fr["t"]), lm))
+
+    spans = []
+    for sp in data.get("spans", []):
+        if sp.get("kind") not in SPAN_KINDS:
+            raise ValueError(f"{path}: unknown span kind {sp.get('kind')!r}")
+        spans.append({"kind": sp["kind"], "start": float(sp["start"]), "end": float(sp["end"])})
+
+    return {"path": path, "meta": data.get("meta", {}), "frames": frames, "spans": spans}
+
+
+# =============================
+# Replay + scoring
+# =============================
+def replay(trace, cfg, screen_w=1920, screen_h=1080):
+    """
+    Feed a trace through the landmark filter and GestureMachine exactly like
+    run_gesture does. Returns the list of GestureEvent.
+    """
+    machine = GestureMachine(cfg, screen_w, screen_h)
+    lm_filter = LandmarkFilter.from_config(cfg)
+    events = []
+    for t, lm in trace["frames"]:
+        bridged = False
+        if lm_filter is not None:
+            lm = lm_filter.update(t, lm)
+            bridged = lm_filter.bridged
+        if lm is not None:
+            events.extend(machine.update(t, lm, bridged=bridged))
+        else:
+            events.extend(machine.lost(t))
+    return events
+
+
+def score_events(spans, events, tol=0.15):
+    """
+    Match emitted events against intended spans.
+
+    - click  hit: a CLICK within [start - tol, end + tol]; latency = click time - end
+    - drag   hit: DRAG_START and DRAG_END within the window; latency = drag start - start
+    - scroll hit: any SCROLL within the window; latency = first scroll - start
+    - false action: every CLICK / DRAG_START not used by a hit (what the user feels
+      as a misfire): outside every window, a second one in the same window, or the
+      wrong kind (DRAG_START in a click span, CLICK in a drag span)
+    """
+    clicks = [e for e in events if e.kind == CLICK]
+    drag_starts = [e for e in events if e.kind == DRAG_START]
+    drag_ends = [e for e in events if e.kind == DRAG_END]
+    scrolls = [e for e in events if e.kind == SCROLL]
+
+    result = {k: {"spans": 0, "hit": 0, "latency": []} for k in SPAN_KINDS}
+    used = set()  # id() of CLICK / DRAG_START matched to a span
+
+    def first_unused(evs, lo, hi):
+        for e in evs:
+            if lo <= e.t <= hi and id(e) not in used:
+                return e
+        return None
+
+    for sp in sorted(spans, key=lambda sp: sp["start"]):
+        lo, hi = sp["start"] - tol, sp["end"] + tol
+        r = result[sp["kind"]]
+        r["spans"] += 1
+
+        if sp["kind"] == "click":
+            got = first_unused(clicks, lo, hi)
+            if got is not None:
+                used.add(id(got))
+                r["hit"] += 1
+                r["latency"].append(got.t - sp["end"])
+        elif sp["kind"] == "drag":
+            ds = first_unused(drag_starts, lo, hi)
+            if ds is not None:
+                used.add(id(ds))
+                if any(ds.t <= e.t <= hi for e in drag_ends):
+                    r["hit"] += 1
+                    r["latency"].append(ds.t - sp["start"])
+        else:
+            got = [e for e in scrolls if lo <= e.t <= hi]
+            if got:
+                r["hit"] += 1
+                r["latency"].append(got[0].t - sp["start"])
+
+    result["false_actions"] = sum(1 for e in clicks + drag_starts if id(e) not in used)
+    return result
+
+
+def median(values):
+    if not values:
+        return None
+    v = sorted(values)
+    n = len(v)
+    return v[n // 2] if n % 2 else (v[n // 2 - 1] + v[n // 2]) / 2.0
+
+
+# =============================
+# Synthetic landmarks (soak test, regression checks)
+# =============================
+def synthetic_hand(cx, cy, pinch_d, two=False):
+    """
+    21 points of a right hand seen from the front, palm size 0.2 (wrist -> middle MCP).
+    pinch_d: thumb tip -> index tip; two: middle finger extended too (scroll pose).
+    """
+    lm = [(cx, cy)] * 21
+    lm[0] = (cx, cy + 0.20)
+    for i, dx in zip((5, 9, 13, 17), (-0.045, 0.0, 0.035, 0.065)):
+        lm[i] = (cx + dx, cy)
+    # thumb tip stays put (the cursor follows it), the index tip bends towards it;
+    # index always extended (tip above pip above mcp)
+    tx, ty = cx - 0.12, cy - 0.10
+    ix = tx + pinch_d
+    lm[6], lm[7], lm[8] = (cx - 0.045, cy - 0.05), ((cx - 0.045 + ix) / 2, cy - 0.075), (ix, ty)
+    # middle extended only in the scroll pose
+    if two:
+        lm[10], lm[11], lm[12] = (cx, cy - 0.05), (cx, cy - 0.08), (cx, cy - 0.11)
+    else:
+        lm[10], lm[11], lm[12] = (cx, cy - 0.04), (cx, cy - 0.03), (cx, cy - 0.01)
+    # ring / pinky curled
+    for mcp in (13, 17):
+        x = lm[mcp][0]
+        lm[mcp + 1], lm[mcp + 2], lm[mcp + 3] = (x, cy - 0.03), (x, cy - 0.02), (x, cy)
+    # thumb: from the wrist towards its tip
+    for j, f in zip((1, 2, 3, 4), (0.3, 0.55, 0.8, 1.0)):
+        lm[j] = (cx + (tx - cx) * f - 0.05 * (1 - f), lm[0][1] + (ty - lm[0][1]) * f)
+    return [[round(x, 5), round(y, 5), 0.0] for x, y in lm]
+
+
+def synthetic_trace(fps=30):
+    """
+    About 12 s of landmarks that use every part of the landmark path: cursor movement,
+    a click, a drag, two-finger scrolling, a short dropout (bridged) and a drag
+    interrupted by a long one (hand lost => drag released). Spans are labeled, so
+    it is also a valid scorecard trace.
+    """
+    frames, spans = [], []
+    t = 0.0
+
+    def seg(n, pinch=0.12, two=False, x0=0.5, y0=0.5, x1=None, y1=None, lost=False):
+        nonlocal t
+        x1 = x0 if x1 is None else x1
+        y1 = y0 if y1 is None else y1
+        pinches = pinch if isinstance(pinch, (list, tuple)) else [pinch] * n
+        for i, d in enumerate(pinches):
+            f = i / max(1, len(pinches) - 1)
+            lm = None if lost else synthetic_hand(x0 + (x1 - x0) * f, y0 + (y1 - y0) * f, d, two)
+            frames.append({"t": round(t, 4), "lm": lm})
+            t += 1.0 / fps
+
+    seg(60, x0=0.3, x1=0.6, y1=0.4)                       # move
+    seg(2, pinch=[0.09, 0.06], x0=0.6, y0=0.4)
+    c0 = t
+    seg(2, pinch=0.02, x0=0.6, y0=0.4)                    # click
+    spans.append({"kind": "click", "start": round(c0, 3), "end": round(t, 3)})
+    seg(3, pinch=[0.08, 0.1, 0.12], x0=0.6, y0=0.4)
+    seg(30, x0=0.6, y0=0.4, x1=0.4, y1=0.5)
+    seg(3, pinch=[0.09, 0.06, 0.035], x0=0.4)
+    d0 = t
+    seg(30, pinch=0.02, x0=0.4, x1=0.6)                   # drag
+    spans.append({"kind": "drag", "start": round(d0, 3), "end": round(t, 3)})
+    seg(3, pinch=[0.05, 0.09, 0.12], x0=0.6)
+    seg(20, x0=0.6, x1=0.5)
+    s0 = t
+    seg(45, two=True, y0=0.35, y1=0.65)                   # scroll
+    spans.append({"kind": "scroll", "start": round(s0, 3), "end": round(t, 3)})
+    seg(30, x0=0.5, x1=0.4)
+    seg(3, lost=True)                                     # short dropout => bridged
+    seg(30, x0=0.4, x1=0.5)
+    seg(3, pinch=[0.09, 0.06, 0.035], x0=0.5)
+    d0 = t
+    seg(10, pinch=0.02, x0=0.5, x1=0.55)                  # drag, then the hand leaves view:
+    seg(30, lost=True)                                    # lost() releases it
+    spans.append({"kind": "drag", "start": round(d0, 3), "end": round(t, 3)})
+    seg(60, x0=0.5, x1=0.3, y1=0.5)
+    return {"path": "<synthetic>", "meta": {"fps": fps}, "spans": spans,
+            "frames": [(f["t"], None if f["lm"] is None else [Landmark(*p) for p in f["lm"]])
+                       for f in frames]}
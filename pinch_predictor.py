@@ -0,0 +1,132 @@
+class PinchPredictor:
+    """
+    Predicts pinch onset / release from the thumb-index closing speed.
+
+    Speed is measured in palm sizes per second (wrist -> middle MCP), so it does not
+    depend on how far the hand is from the camera. Distance gates stay in the same
+    units as PINCH_ON / PINCH_OFF.
+
+    onset():   distance already within PINCH_ON * (1 + lead), closing for >= 2 frames
+               faster than min_speed, and expected to cross PINCH_ON within horizon.
+    release(): opening for >= 2 frames faster than min_speed and already past the
+               middle of the PINCH_ON .. PINCH_OFF hysteresis band.
+
+    The state machine still requires the distance to actually reach PINCH_ON before
+    any click / mouseDown is emitted; onset() only starts the pinch early.
+    """
+    def __init__(self, pinch_on, pinch_off, lead=0.25, min_speed=1.5,
+                 horizon=0.05, alpha=0.6, max_gap=0.2):
+        self.pinch_on = pinch_on
+        self.pinch_off = pinch_off
+        self.lead = lead            # how far above PINCH_ON onset may fire (fraction)
+        self.min_speed = min_speed  # palm sizes / s
+        self.horizon = horizon      # s, predicted time to reach PINCH_ON
+        self.alpha = alpha          # EMA on speed
+        self.max_gap = max_gap      # s, longer gaps reset the history
+        self.reset()
+
+    def reset(self):
+        self.last_t = None
+        self.last_r = None
+        self.last_palm = None
+        self.speed = 0.0  # d(pinch / palm)/dt, negative = closing
+        self.closing_frames = 0
+        self.opening_frames = 0
+
+    def update(self, now, pinch_d, palm):
+        palm = max(1e-6, palm)
+        r = pinch_d / palm
+
+        if self.last_t is None or now <= self.last_t or now - self.last_t > self.max_gap:
+            self.reset()
+        else:
+            v = (r - self.last_r) / (now - self.last_t)
+            self.speed += self.alpha * (v - self.speed)
+            self.closing_frames = self.closing_frames + 1 if v < 0 else 0
+            self.opening_frames = self.opening_frames + 1 if v > 0 else 0
+
+        self.last_t = now
+        self.last_r = r
+        self.last_palm = palm
+
+    def onset(self, pinch_d):
+        if self.closing_frames < 2 or -self.speed < self.min_speed:
+            return False
+        if pinch_d >= self.pinch_on * (1.0 + self.lead):
+            return False
+
+        gap = pinch_d - self.pinch_on
+        if gap <= 0:
+            return True
+        return gap / (-self.speed * self.last_palm) <= self.horizon
+
+    def release(self, pinch_d):
+        if self.opening_frames < 2 or self.speed < self.min_speed:
+            return False
+        return pinch_d > (self.pinch_on + self.pinch_off) / 2.0
+
+
+# =============================
+# Latency vs false-click tradeoff on recorded traces
+# =============================
+def tradeoff(paths, params=None, leads=(0.1, 0.25, 0.4), speeds=(1.0, 1.5, 2.5), tol=0.15):
+    """
+    Replays labeled traces (see landmark_traces.py) with predictive pinch off
+    (baseline) and for each (lead, speed) pair.
+    """
+    from gesture_logic import engine_config
+    from landmark_traces import load_trace, replay, score_events, median
+
+    traces = [load_trace(p) for p in paths]
+    base = dict(params or {})
+
+    settings = [("off", dict(base, predictive_pinch=False))]
+    for lead in leads:
+        for speed in speeds:
+            settings.append((f"lead={lead:.2f} speed={speed:.1f}",
+                             dict(base, predictive_pinch=True, pinch_lead=lead, pinch_speed=speed)))
+
+    rows = []
+    for name, p in settings:
+        cfg = engine_config(p)
+        clicks = hits = drags = drag_hits = false_actions = 0
+        click_lat, drag_lat = [], []
+        for tr in traces:
+            r = score_events(tr["spans"], replay(tr, cfg), tol)
+            clicks += r["click"]["spans"]
+            hits += r["click"]["hit"]
+            drags += r["drag"]["spans"]
+            drag_hits += r["drag"]["hit"]
+            click_lat += r["click"]["latency"]
+            drag_lat += r["drag"]["latency"]
+            false_actions += r["false_actions"]
+        rows.append({
+            "setting": name,
+            "clicks": f"{hits}/{clicks}",
+            "drags": f"{drag_hits}/{drags}",
+            "false": false_actions,
+            "click_ms": median(click_lat),
+            "drag_ms": median(drag_lat),
+        })
+
+    def ms(v):
+        return "   -" if v is None else f"{v * 1000:4.0f}"
+
+    print(f"{'setting':<24} {'clicks':>8} {'drags':>7} {'false':>6} {'click ms':>9} {'drag ms':>8}")
+    for r in rows:
+        print(f"{r['setting']:<24} {r['clicks']:>8} {r['drags']:>7} {r['false']:>6} "
+              f"{ms(r['click_ms']):>9} {ms(r['drag_ms']):>8}")
+    print("click ms: click event - end of annotated contact; drag ms: mouseDown - start of pinch")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Predictive pinch: latency vs false clicks on recorded traces")
+    ap.add_argument("traces", nargs="+", help="labeled landmark traces (.json)")
+    ap.add_argument("--click-sens", type=float, default=0.65)
+    ap.add_argument("--drag-delay-ms", type=int, default=160)
+    args = ap.parse_args()
+
+    tradeoff(args.traces, {"click_sens": args.click_sens, "drag_delay_ms": args.drag_delay_ms})
@@ -0,0 +1,121 @@
+import time
+
+
+# low -> high; the last level is what the engine used before (full model, 640 px, 0.6 / 0.6)
+QUALITY_LEVELS = (
+    {"name": "lite-320", "model_complexity": 0, "input_width": 320,
+     "min_detection_confidence": 0.5, "min_tracking_confidence": 0.5},
+    {"name": "lite-480", "model_complexity": 0, "input_width": 480,
+     "min_detection_confidence": 0.55, "min_tracking_confidence": 0.55},
+    {"name": "full-640", "model_complexity": 1, "input_width": 640,
+     "min_detection_confidence": 0.6, "min_tracking_confidence": 0.6},
+)
+
+
+class QualityController:
+    """
+    Watches MediaPipe inference time against the frame budget and moves
+    between QUALITY_LEVELS with hysteresis:
+
+    - down: smoothed time > budget * down_ratio for hold_frames observations
+    - up:   smoothed time < budget * up_ratio  for hold_frames observations,
+            and not within cooldown of the last switch
+    - an upgrade that has to be undone quickly doubles the next up-cooldown,
+      so a machine on the edge does not flip back and forth
+    - the first warmup_obs inference times at startup and after every switch are
+      ignored: a freshly built Hands graph warms up and runs a full palm detection
+    """
+    def __init__(self, budget_ms, levels=QUALITY_LEVELS, start=None,
+                 down_ratio=0.9, up_ratio=0.5, hold_frames=20,
+                 cooldown_s=3.0, max_cooldown_s=60.0, alpha=0.15, warmup_obs=5):
+        self.budget_ms = float(budget_ms)
+        self.levels = levels
+        self.level = len(levels) - 1 if start is None else max(0, min(len(levels) - 1, int(start)))
+
+        self.down_ratio = down_ratio
+        self.up_ratio = up_ratio
+        self.hold_frames = hold_frames
+        self.base_cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.alpha = alpha
+        self.warmup_obs = max(0, int(warmup_obs))
+
+        self.skip = self.warmup_obs
+        self.ema_ms = None
+        self.over = 0
+        self.under = 0
+        self.up_cooldown_s = cooldown_s
+        self.last_switch_t = 0.0
+        self.last_switch_dir = 0
+
+        self.switches = []  # history, for logging / metrics
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def observe(self, infer_ms, now=None):
+        """
+        Feed one inference time (ms). Returns the new settings dict when the level changes, else None.
+        """
+        if now is None:
+            now = time.time()
+
+        if self.skip > 0:
+            self.skip -= 1
+            return None
+
+        if self.ema_ms is None:
+            self.ema_ms = float(infer_ms)
+        else:
+            self.ema_ms += self.alpha * (float(infer_ms) - self.ema_ms)
+
+        if self.ema_ms > self.budget_ms * self.down_ratio:
+            self.over += 1
+            self.under = 0
+        elif self.ema_ms < self.budget_ms * self.up_ratio:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.hold_frames and self.level > 0:
+            # 刚升级就扛不住 => 下次升级等更久
+            if self.last_switch_dir > 0 and now - self.last_switch_t < self.up_cooldown_s * 2:
+                self.up_cooldown_s = min(self.max_cooldown_s, self.up_cooldown_s * 2)
+            return self._switch(self.level - 1, now, "over budget")
+
+        if (self.under >= self.hold_frames and self.level < len(self.levels) - 1
+                and now - self.last_switch_t >= self.up_cooldown_s):
+            return self._switch(self.level + 1, now, "headroom")
+
+        return None
+
+    def _switch(self, level, now, reason):
+        old = self.levels[self.level]["name"]
+        direction = 1 if level > self.level else -1
+        if now - self.last_switch_t > self.max_cooldown_s:
+            # stable for a long time: forget the back-off
+            self.up_cooldown_s = self.base_cooldown_s
+
+        self.level = level
+        self.over = self.under = 0
+        self.ema_ms = None
+        self.skip = self.warmup_obs
+        self.last_switch_t = now
+        self.last_switch_dir = direction
+
+        new = self.levels[level]["name"]
+        self.switches.append({"t": now, "from": old, "to": new, "reason": reason})
+        print(f"⚙️  Quality {old} -> {new} ({reason}, budget {self.budget_ms:.1f} ms)")
+        return self.settings
+
+    def metrics(self):
+        return {
+            "quality": self.settings["name"],
+            "quality_level": self.level,
+            "infer_ema_ms": round(self.ema_ms, 2) if self.ema_ms is not None else None,
+            "frame_budget_ms": round(self.budget_ms, 2),
+            "quality_switches": len(self.switches),
+            "last_quality_switch": self.switches[-1] if self.switches else None,
+        }
@@ -0,0 +1,252 @@
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".gesture_mouse_control", "profiles")
+
+
+class StageTimes:
+    """
+    Per-stage wall time of the engine loop (perf_counter), collected only while a
+    profile is running. Unlike the stack samples this is not biased by the GIL:
+    the engine measures itself, so the shares of "MediaPipe vs pyautogui vs Python"
+    are exact.
+
+    The engine calls record(stage=seconds, ...) once per frame when .active.
+    """
+    def __init__(self):
+        self.active = False
+        self.totals = Counter()
+        self.frames = 0
+
+    def start(self):
+        self.totals = Counter()
+        self.frames = 0
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def record(self, **stages):
+        for name, sec in stages.items():
+            self.totals[name] += sec
+        self.frames += 1
+
+    def shares(self):
+        total = sum(self.totals.values())
+        if not total:
+            return []
+        return [(name, sec / total, sec * 1000.0 / self.frames) for name, sec in self.totals.most_common()]
+
+
+# the engine loop reports into this one (a single engine thread per process)
+STAGE_TIMES = StageTimes()
+
+
+def _bucket(stack):
+    """
+    Where did this sample go? MediaPipe / pyautogui / our own Python code.
+    (OpenCV / numpy are C calls without Python frames: they show up as the
+    line of our code that called them, e.g. hand_tracker.py:_track.)
+    """
+    for filename, _, _ in stack:
+        if "mediapipe" in filename:
+            return "mediapipe (hands.process)"
+        if "pyautogui" in filename:
+            return "pyautogui"
+    leaf = stack[-1][0] if stack else "?"
+    return f"python: {os.path.basename(leaf)}"
+
+
+class ThreadSampler:
+    """
+    Sampling profiler for ONE thread (the gesture engine), switchable at runtime.
+
+    Every 1/rate seconds it reads that thread's current Python stack via
+    sys._current_frames(); nothing is installed in the target thread, so the
+    engine runs at full speed when the sampler is off and close to it when on.
+    The sampler needs the GIL to take a sample, so time inside a C call that
+    holds the GIL is attributed to the Python line that made the call.
+
+    Bias: with the default 5 ms switch interval the sampler mostly gets the GIL
+    when the engine releases it (sleep, camera read, OpenCV / MediaPipe calls),
+    so short Python stretches between C calls are nearly invisible. While
+    sampling, sys.setswitchinterval is lowered to switch_interval (restored
+    afterwards); Python code is still somewhat under-counted.
+
+    The time split printed first comes from `stages` (the engine's own
+    perf_counter measurements per loop stage), which has none of this bias;
+    the stack samples are kept for the flamegraph / pstats drill-down.
+
+    Output (in out_dir):
+    - <name>.folded  collapsed stacks, for flamegraph.pl / speedscope / inferno
+    - <name>.pstats  for `python -m pstats` / snakeviz
+    """
+    def __init__(self, thread, rate=100.0, duration=10.0, out_dir=PROFILE_DIR, name=None,
+                 on_done=None, switch_interval=0.0005, stages=STAGE_TIMES):
+        self.thread = thread
+        self.stages = stages
+        self.switch_interval = switch_interval
+        self.interval = 1.0 / max(1.0, float(rate))
+        self.duration = float(duration)
+        self.out_dir = out_dir
+        self.name = name or time.strftime("gesture-%Y%m%d-%H%M%S")
+        self.on_done = on_done
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.paths = None
+        self._stop = threading.Event()
+        self._runner = None
+
+    @property
+    def running(self):
+        return self._runner is not None and self._runner.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        if self.stages is not None:
+            self.stages.start()
+        self._runner = threading.Thread(target=self._run, name="gesture-profiler", daemon=True)
+        self._runner.start()
+        return self
+
+    def stop(self, wait=True):
+        self._stop.set()
+        if wait and self._runner is not None and self._runner is not threading.current_thread():
+            self._runner.join()
+
+    def _run(self):
+        tid = self.thread.ident
+        end = time.perf_counter() + self.duration
+        next_t = time.perf_counter()
+
+        # 缩短 GIL 切换间隔，否则纯 Python 代码几乎采不到
+        old_switch = sys.getswitchinterval()
+        if self.switch_interval:
+            sys.setswitchinterval(min(old_switch, self.switch_interval))
+        try:
+            while not self._stop.is_set() and time.perf_counter() < end and self.thread.is_alive():
+                frame = sys._current_frames().get(tid)
+                if frame is not None:
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                        frame = frame.f_back
+                    stack.reverse()  # root -> leaf
+                    self.stacks[tuple(stack)] += 1
+                    self.samples += 1
+
+                next_t += self.interval
+                delay = next_t - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_t = time.perf_counter()
+        finally:
+            sys.setswitchinterval(old_switch)
+            if self.stages is not None:
+                self.stages.stop()
+
+        try:
+            self.paths = self.write()
+            self.summary()
+        except OSError as e:
+            print(f"⚠️  Cannot write profile: {e}")
+        if self.on_done is not None:
+            self.on_done(self)
+
+    # ---------- output ----------
+    def write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, self.name)
+
+        folded = base + ".folded"
+        with open(folded, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                names = ";".join(f"{func} ({os.path.basename(fn)}:{line})" for fn, line, func in stack)
+                f.write(f"{names} {n}\n")
+
+        stats_path = base + ".pstats"
+        with open(stats_path, "wb") as f:
+            marshal.dump(self.pstats_dict(), f)
+
+        print(f"⏱  Profile: {self.samples} samples -> {folded} / {stats_path}")
+        return folded, stats_path
+
+    def pstats_dict(self):
+        """
+        Sample counts -> the dict format pstats.Stats loads:
+        {func: (cc, nc, tt, ct, {caller: (cc, nc, tt, ct)})}
+        tt = leaf samples * interval, ct = samples where func is on the stack * interval
+        """
+        dt = self.interval
+        stats = {}
+        callers = {}
+
+        def entry(func):
+            if func not in stats:
+                stats[func] = [0, 0, 0.0, 0.0]
+                callers[func] = {}
+            return stats[func]
+
+        for stack, n in self.stacks.items():
+            seen = set()
+            for i, func in enumerate(stack):
+                e = entry(func)
+                if func not in seen:
+                    seen.add(func)
+                    e[0] += n
+                    e[1] += n
+                    e[3] += n * dt
+                if i > 0:
+                    c = callers[func].setdefault(stack[i - 1], [0, 0, 0.0, 0.0])
+                    c[0] += n
+                    c[1] += n
+                    c[3] += n * dt
+            entry(stack[-1])[2] += n * dt
+            if len(stack) > 1:
+                callers[stack[-1]][stack[-2]][2] += n * dt
+
+        return {
+            func: (e[0], e[1], e[2], e[3], {k: tuple(v) for k, v in callers[func].items()})
+            for func, e in stats.items()
+        }
+
+    def summary(self, top=8):
+        shares = self.stages.shares() if self.stages is not None else []
+        if shares:
+            print(f"⏱  Where the engine loop spent its time ({self.stages.frames} frames, measured):")
+            for name, share, ms in shares:
+                print(f"   {share:6.1%}  {ms:6.2f} ms/frame  {name}")
+
+        total = sum(self.stacks.values())
+        if not total:
+            print("⏱  Profile: no stack samples (engine thread idle or stopped)")
+            return {"stages": shares, "samples": {}}
+
+        buckets = Counter()
+        for stack, n in self.stacks.items():
+            buckets[_bucket(stack)] += n
+
+        print(f"⏱  Stack samples ({total}, for the flamegraph; GIL-biased towards C calls / sleeps):")
+        for name, n in buckets.most_common(top):
+            print(f"   {n / total:6.1%}  {name}")
+        return {"stages": shares, "samples": dict(buckets)}
+
+
+def profile_thread(thread, duration=10.0, rate=100.0, out_dir=PROFILE_DIR, on_done=None,
+                   switch_interval=0.0005):
+    """
+    Start sampling `thread` in the background for `duration` seconds.
+    Returns the ThreadSampler (call .stop() to end early).
+    """
+    return ThreadSampler(thread, rate=rate, duration=duration, out_dir=out_dir, on_done=on_done,
+                         switch_interval=switch_interval).start()
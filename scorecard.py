@@ -0,0 +1,217 @@
+import glob
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from gesture_logic import engine_config
+from landmark_traces import SPAN_KINDS, load_trace, replay, score_events, median
+
+
+# =============================
+# Parameter sets
+# =============================
+# "standalone" = the constants in gesture_mouse_control.py, which differ from the
+# engine's slider mapping (PINCH_ON 0.045 vs ~0.039, ARM_FRAMES 4 vs 5, CLICK_TIME 0.4 vs 0.16)
+PRESETS = {
+    "engine": {},
+    "engine-classic": {"predictive_pinch": False, "landmark_filter": False},
+    "standalone": {
+        "predictive_pinch": False, "landmark_filter": False,
+        "SMOOTH_ALPHA": 0.35, "PINCH_ON": 0.045, "PINCH_OFF": 0.055, "ARM_FRAMES": 4,
+        "CLICK_TIME": 0.4, "SCROLL_SCALE": 450, "SCROLL_DEADZONE": 0.004, "MIDDLE_IGNORE_TIME": 0.28,
+    },
+}
+
+DEFAULT_GRID = {
+    "PINCH_ON": [0.032, 0.036, 0.040, 0.045],
+    "PINCH_GAP": [0.010, 0.020],  # PINCH_OFF - PINCH_ON
+    "ARM_FRAMES": [2, 3, 4, 5],
+    "SCROLL_DEADZONE": [0.002, 0.004, 0.006],
+    "MIDDLE_IGNORE_TIME": [0.2, 0.28],
+}
+
+
+def expand_grid(base, grid):
+    """
+    Cartesian product of grid values on top of base params.
+    PINCH_GAP is a helper key: PINCH_OFF = PINCH_ON + PINCH_GAP.
+    Combinations engine_config rejects (PINCH_OFF <= PINCH_ON) are skipped.
+    """
+    keys = list(grid)
+    sets = []
+    skipped = 0
+    for values in itertools.product(*(grid[k] for k in keys)):
+        p = dict(base)
+        p.update(zip(keys, values))
+        if "PINCH_GAP" in p:
+            gap = p.pop("PINCH_GAP")
+            p["PINCH_OFF"] = p.get("PINCH_ON", engine_config(base)["PINCH_ON"]) + gap
+        try:
+            engine_config(p)
+        except ValueError:
+            skipped += 1
+            continue
+        name = " ".join(f"{k}={v}" for k, v in zip(keys, values))
+        sets.append((name, p))
+    if skipped:
+        print(f"⚠️  Skipped {skipped} parameter sets with PINCH_OFF <= PINCH_ON")
+    return sets
+
+
+# =============================
+# Parallel replay
+# =============================
+_traces = None
+
+
+def _init_worker(paths):
+    global _traces
+    _traces = [load_trace(p) for p in paths]
+
+
+def _score_one(task):
+    set_idx, trace_idx, cfg, tol = task
+    tr = _traces[trace_idx]
+    r = score_events(tr["spans"], replay(tr, cfg), tol)
+    frames = tr["frames"]
+    duration = frames[-1][0] - frames[0][0] if len(frames) > 1 else 0.0
+    return set_idx, r, duration
+
+
+def corpus_paths(inputs):
+    """
+    Files and/or directories (every *.json inside is one labeled trace).
+    """
+    paths = []
+    for p in inputs:
+        if os.path.isdir(p):
+            paths.extend(sorted(glob.glob(os.path.join(p, "**", "*.json"), recursive=True)))
+        else:
+            paths.append(p)
+    return paths
+
+
+def score_sets(paths, param_sets, tol=0.15, workers=None):
+    """
+    param_sets: [(name, params)]. Replays every (set, trace) pair across CPU cores.
+    Returns one row per set.
+    """
+    cfgs = [engine_config(p) for _, p in param_sets]
+    tasks = [(i, j, cfg, tol) for i, cfg in enumerate(cfgs) for j in range(len(paths))]
+
+    rows = []
+    for name, _ in param_sets:
+        row = {"name": name, "duration_s": 0.0, "false_actions": 0}
+        for k in SPAN_KINDS:
+            row[k] = {"spans": 0, "hit": 0, "latency": []}
+        rows.append(row)
+
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(paths,)) as ex:
+        for set_idx, r, duration in ex.map(_score_one, tasks, chunksize=chunk):
+            row = rows[set_idx]
+            row["duration_s"] += duration
+            row["false_actions"] += r["false_actions"]
+            for k in SPAN_KINDS:
+                row[k]["spans"] += r[k]["spans"]
+                row[k]["hit"] += r[k]["hit"]
+                row[k]["latency"] += r[k]["latency"]
+
+    for row in rows:
+        spans = sum(row[k]["spans"] for k in SPAN_KINDS)
+        row["missed"] = spans - sum(row[k]["hit"] for k in SPAN_KINDS)
+        minutes = row["duration_s"] / 60.0
+        row["false_per_min"] = row["false_actions"] / minutes if minutes > 0 else 0.0
+        for k in SPAN_KINDS:
+            row[k]["median_s"] = median(row[k]["latency"])
+        # click latency counts from the end of the contact, drag / scroll from the start,
+        # so kinds are never pooled: rank on the sum of per-kind medians
+        row["latency_s"] = sum(row[k]["median_s"] or 0.0 for k in SPAN_KINDS)
+    return rows
+
+
+def print_rows(rows, title):
+    def ms(v):
+        return "-" if v is None else f"{v * 1000:.0f}"
+
+    print(title)
+    print("  latency medians per kind: click from end of contact, drag / scroll from start; "
+          "sum = ranking key")
+    print(f"  {'false/min':>9} {'false':>6} {'missed':>6} {'click':>7} {'drag':>7} {'scroll':>7} "
+          f"{'sum ms':>7} {'click':>6} {'drag':>6} {'scroll':>6}  params")
+    for r in rows:
+        print(f"  {r['false_per_min']:>9.2f} {r['false_actions']:>6} {r['missed']:>6} "
+              f"{r['click']['hit']:>3}/{r['click']['spans']:<3} {r['drag']['hit']:>3}/{r['drag']['spans']:<3} "
+              f"{r['scroll']['hit']:>3}/{r['scroll']['spans']:<3} {ms(r['latency_s']):>7} "
+              f"{ms(r['click']['median_s']):>6} {ms(r['drag']['median_s']):>6} {ms(r['scroll']['median_s']):>6}  "
+              f"{r['name']}")
+
+
+def grid_search(paths, base, grid, tol=0.15, workers=None, max_false_per_min=0.0, top=10):
+    """
+    Fast without misfires: keep sets at or below max_false_per_min,
+    then rank by missed actions, then the sum of per-kind median latencies.
+    """
+    sets = expand_grid(base, grid)
+    print(f"🔎 Grid search: {len(sets)} parameter sets x {len(paths)} traces")
+    rows = score_sets(paths, sets, tol, workers)
+
+    ok = [r for r in rows if r["false_per_min"] <= max_false_per_min]
+    ok.sort(key=lambda r: (r["missed"], r["latency_s"]))
+    if not ok:
+        print(f"⚠️  No parameter set stays at <= {max_false_per_min} false actions / min")
+        rows.sort(key=lambda r: (r["false_per_min"], r["missed"]))
+        print_rows(rows[:top], "Least misfires:")
+        return rows[:top]
+
+    print_rows(ok[:top], f"Best {min(top, len(ok))} of {len(ok)} sets without misfires:")
+    return ok[:top]
+
+
+def _number(v):
+    try:
+        return int(v)
+    except ValueError:
+        return float(v)
+
+
+def _parse_grid(items):
+    known = set(engine_config({})) | {"PINCH_GAP"}
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        key = key.strip()
+        if key not in known:
+            raise SystemExit(f"❌ Unknown grid key {key!r} (engine constants: {', '.join(sorted(known))})")
+        grid[key] = [_number(v) for v in values.split(",") if v]
+        if not grid[key]:
+            raise SystemExit(f"❌ No values for {key!r}")
+    return grid
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Gesture accuracy / responsiveness scorecard over a labeled landmark corpus")
+    ap.add_argument("corpus", nargs="+", help="labeled trace files or directories (see landmark_traces.py)")
+    ap.add_argument("--preset", nargs="*", default=list(PRESETS), choices=list(PRESETS))
+    ap.add_argument("--grid", action="store_true", help="grid search around the engine preset")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=v1,v2",
+                    help="grid values, e.g. --set PINCH_ON=0.035,0.04 --set ARM_FRAMES=2,3 (default grid if omitted)")
+    ap.add_argument("--max-false-per-min", type=float, default=0.0)
+    ap.add_argument("--tol", type=float, default=0.15, help="seconds of slack around each labeled span")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    paths = corpus_paths(args.corpus)
+    if not paths:
+        raise SystemExit("❌ No traces found")
+
+    if args.grid:
+        grid = _parse_grid(args.set) if args.set else DEFAULT_GRID
+        grid_search(paths, PRESETS["engine"], grid, args.tol, args.workers, args.max_false_per_min, args.top)
+    else:
+        rows = score_sets(paths, [(name, PRESETS[name]) for name in args.preset], args.tol, args.workers)
+        print_rows(rows, f"Scorecard over {len(paths)} traces:")
@@ -0,0 +1,392 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from gesture_engine import run_gesture
+from gesture_events import EventBus, CallbackSubscriber
+from landmark_traces import load_trace, synthetic_trace
+
+
+# =============================
+# Frame sources (VideoCapture-like)
+# =============================
+class SyntheticSource:
+    """
+    Endless moving noise pattern. MediaPipe finds no hand, so this only soaks the
+    camera -> resize -> detection path; TraceSource covers the landmark path.
+    fps=0 => as fast as the pipeline can take frames (accelerated).
+    """
+    def __init__(self, width=640, height=480, fps=0):
+        rng = np.random.default_rng(0)
+        self.base = (rng.random((height, width * 2, 3)) * 255).astype(np.uint8)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.i = 0
+        self._next = time.perf_counter()
+
+    def read(self):
+        if self.fps:
+            delay = self._next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + 1.0 / self.fps, time.perf_counter())
+        off = self.i % self.width
+        self.i += 1
+        return True, self.base[:, off:off + self.width].copy()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 30)
+        return 0.0
+
+    def release(self):
+        pass
+
+
+class LoopingVideoSource:
+    """
+    Recorded clip played in a loop forever.
+    """
+    def __init__(self, path, fps=0):
+        self.path = path
+        self.fps = fps
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise OSError(f"Cannot open {path}")
+        self.loops = 0
+        self._next = time.perf_counter()
+
+    def read(self):
+        if self.fps:
+            delay = self._next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + 1.0 / self.fps, time.perf_counter())
+        ok, frame = self.cap.read()
+        if not ok:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.loops += 1
+            ok, frame = self.cap.read()
+        return ok, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or self.cap.get(cv2.CAP_PROP_FPS) or 30)
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+class TraceSource:
+    """
+    Landmark trace (load_trace() dict or .json path) played in a loop, without MediaPipe.
+
+    read() renders the 21 points as dots (mirrored, so the engine's flip puts them
+    back where the trace has them); hands(settings) is a stand-in for make_hands
+    whose process() returns the trace landmarks of the frame last read. Optical flow,
+    filter, state machine, event bus and trace recording all run as usual.
+    now() is the trace time of that frame (continuing across loops); run_gesture
+    uses it instead of the wall clock, so timing-based gestures behave as recorded
+    at any replay speed.
+    fps=0 => accelerated, None => the trace's own frame rate.
+    """
+    def __init__(self, trace=None, fps=0, width=640, height=480):
+        if trace is None:
+            trace = synthetic_trace()
+        elif isinstance(trace, str):
+            trace = load_trace(trace)
+        self.frames = [lm for _, lm in trace["frames"]]
+        if not self.frames:
+            raise ValueError(f"{trace.get('path')}: trace has no frames")
+        trace_fps = float(trace.get("meta", {}).get("fps") or 30)
+        if fps is None:
+            fps = trace_fps
+        self.fps = fps
+        self.times = [t for t, _ in trace["frames"]]
+        # one loop = first -> last frame + one frame interval
+        self.loop_s = self.times[-1] - self.times[0] + 1.0 / trace_fps
+        self.t0 = time.time()
+        self.width = width
+        self.height = height
+        self.i = -1
+        self.loops = 0
+        self._next = time.perf_counter()
+
+    def read(self):
+        if self.fps:
+            delay = self._next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + 1.0 / self.fps, time.perf_counter())
+        self.i += 1
+        if self.i >= len(self.frames):
+            self.i = 0
+            self.loops += 1
+
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        lm = self.frames[self.i]
+        if lm is not None:
+            for k, p in enumerate(lm):
+                x = int(round((1.0 - p.x) * self.width))
+                y = int(round(p.y * self.height))
+                cv2.circle(frame, (x, y), 5, (255, 255, 255), -1)
+                cv2.circle(frame, (x, y), 2, (40 + 10 * k,) * 3, -1)
+        return True, frame
+
+    def current(self):
+        return self.frames[self.i] if self.i >= 0 else None
+
+    def now(self):
+        i = max(0, self.i)
+        return self.t0 + self.loops * self.loop_s + self.times[i] - self.times[0]
+
+    def hands(self, settings=None):
+        return _TraceHands(self)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 30)
+        return 0.0
+
+    def release(self):
+        pass
+
+
+class _TraceHands:
+    """
+    MediaPipe Hands stand-in: process() returns the trace landmarks of the current frame.
+    """
+    class _Hand:
+        def __init__(self, landmark):
+            self.landmark = landmark
+
+    class _Result:
+        def __init__(self, hands):
+            self.multi_hand_landmarks = hands
+
+    def __init__(self, source):
+        self.source = source
+
+    def process(self, rgb):
+        lm = self.source.current()
+        return self._Result(None if lm is None else [self._Hand(lm)])
+
+    def close(self):
+        pass
+
+
+# =============================
+# Process probes
+# =============================
+def rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def open_handles():
+    try:
+        import psutil
+        p = psutil.Process()
+        return p.num_handles() if sys.platform == "win32" else p.num_fds()
+    except ImportError:
+        pass
+    for d in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(d))
+        except OSError:
+            continue
+    return None
+
+
+# =============================
+# Soak
+# =============================
+def soak(source, duration_s, params=None, interval_s=60.0, warmup_s=60.0,
+         max_rss_mb=50.0, max_traced_mb=20.0, max_handles=8, max_threads=2,
+         top=10, frames_depth=1, screen_size=(1920, 1080)):
+    """
+    Run the full run_gesture pipeline from `source` for duration_s.
+    Samples every interval_s; growth is measured against the sample taken after warmup_s
+    (MediaPipe / OpenCV allocate their pools during the first frames).
+    Mouse output is disabled and screen_size is given, so no display is needed.
+    A TraceSource also replaces MediaPipe (source.hands).
+
+    Returns (ok, report_dict).
+    """
+    params = dict(params or {})
+    params.setdefault("camera_probe", False)
+    run_kw = dict(screen_size=screen_size)
+    if isinstance(source, TraceSource):
+        run_kw["hands_factory"] = source.hands
+
+    stop = threading.Event()
+    metrics = {}
+    bus = EventBus()
+    received = [0]
+
+    def on_events(batch):
+        received[0] += len(batch)
+    bus.subscribe(CallbackSubscriber(on_events))
+
+    tracemalloc.start(frames_depth)
+
+    engine = threading.Thread(
+        target=run_gesture,
+        args=(stop, params),
+        kwargs=dict(bus=bus, metrics=metrics, source=source, apply=lambda ev: None, **run_kw),
+        daemon=True,
+    )
+    engine.start()
+
+    def sample():
+        traced, _ = tracemalloc.get_traced_memory()
+        return {
+            "t": time.time() - t_start,
+            "frames": metrics.get("frames", 0),
+            "fps": metrics.get("fps", 0.0),
+            "rss_mb": rss_mb(),
+            "traced_mb": traced / 1e6,
+            "handles": open_handles(),
+            "threads": threading.active_count(),
+        }
+
+    def show(s, tag=""):
+        rss = "-" if s["rss_mb"] is None else f"{s['rss_mb']:.1f}"
+        print(f"[{s['t'] / 60:7.1f} min] frames={s['frames']:<9} fps={s['fps']:<6} "
+              f"rss={rss}MB traced={s['traced_mb']:.1f}MB handles={s['handles']} threads={s['threads']} {tag}")
+
+    t_start = time.time()
+    samples = []
+    baseline = None
+    baseline_snap = None
+    try:
+        while True:
+            wait = warmup_s if baseline is None else interval_s
+            if stop.wait(min(wait, max(0.0, duration_s - (time.time() - t_start)))):
+                break
+            if not engine.is_alive():
+                print("❌ Engine thread exited early")
+                break
+
+            s = sample()
+            samples.append(s)
+            if baseline is None:
+                baseline = s
+                baseline_snap = tracemalloc.take_snapshot()
+                show(s, "(baseline)")
+            else:
+                show(s)
+
+            if time.time() - t_start >= duration_s:
+                break
+    finally:
+        final_snap = tracemalloc.take_snapshot()
+        stop.set()
+        engine.join(10.0)
+        bus.close()
+        tracemalloc.stop()
+
+    if baseline is None or len(samples) < 2:
+        print("⚠️  Run too short for a baseline + one sample")
+        return False, {"samples": samples}
+
+    last = samples[-1]
+    growth = {
+        "rss_mb": (last["rss_mb"] - baseline["rss_mb"]) if last["rss_mb"] is not None and baseline["rss_mb"] is not None else None,
+        "traced_mb": last["traced_mb"] - baseline["traced_mb"],
+        "handles": (last["handles"] - baseline["handles"]) if last["handles"] is not None and baseline["handles"] is not None else None,
+        "threads": last["threads"] - baseline["threads"],
+    }
+    limits = {"rss_mb": max_rss_mb, "traced_mb": max_traced_mb, "handles": max_handles, "threads": max_threads}
+    failed = [k for k, v in growth.items() if v is not None and v > limits[k]]
+
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    diff = final_snap.filter_traces(filters).compare_to(baseline_snap.filter_traces(filters), "lineno")
+    growing = [d for d in diff if d.size_diff > 0][:top]
+
+    print()
+    print(f"Frames: {last['frames']}  events received by subscriber: {received[0]}")
+    print("Growth since baseline:")
+    for k, v in growth.items():
+        mark = "❌" if k in failed else "✅"
+        val = "n/a" if v is None else (f"{v:+.2f}" if isinstance(v, float) else f"{v:+d}")
+        print(f"  {mark} {k:<10} {val:>9}  (limit {limits[k]})")
+
+    print(f"Top {len(growing)} growing allocation sites:")
+    for d in growing:
+        frame = d.traceback[0]
+        print(f"  {d.size_diff / 1024:+9.1f} KiB {d.count_diff:+7d} blocks  {frame.filename}:{frame.lineno}")
+
+    stuck = engine.is_alive()
+    if stuck:
+        print("❌ Engine thread did not stop within 10 s")
+
+    ok = not failed and not stuck
+    report = {
+        "samples": samples,
+        "growth": growth,
+        "limits": limits,
+        "failed": failed,
+        "growing": [(str(d.traceback[0]), d.size_diff, d.count_diff) for d in growing],
+    }
+    print("✅ Soak passed" if ok else "❌ Soak failed")
+    return ok, report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Long-running soak: memory / handle / thread growth of run_gesture")
+    src_group = ap.add_mutually_exclusive_group()
+    src_group.add_argument("--trace", help="landmark trace to loop without MediaPipe (default: built-in gestures)")
+    src_group.add_argument("--video", help="recorded clip to loop through MediaPipe")
+    src_group.add_argument("--noise", action="store_true", help="synthetic noise frames (no hand, detection path only)")
+    ap.add_argument("--hours", type=float, default=1.0)
+    ap.add_argument("--fps", type=float, default=0,
+                    help="source frame rate, 0 = accelerated (traces keep their own timing either way)")
+    ap.add_argument("--screen", default="1920x1080", help="screen size the cursor is mapped to")
+    ap.add_argument("--record-trace", help="also run the TraceRecorder (keeps every frame in memory: expect growth)")
+    ap.add_argument("--interval", type=float, default=60.0, help="seconds between samples")
+    ap.add_argument("--warmup", type=float, default=60.0, help="seconds before the baseline sample")
+    ap.add_argument("--max-rss-mb", type=float, default=50.0)
+    ap.add_argument("--max-traced-mb", type=float, default=20.0)
+    ap.add_argument("--max-handles", type=int, default=8)
+    ap.add_argument("--max-threads", type=int, default=2)
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    if args.video:
+        src = LoopingVideoSource(args.video, args.fps)
+    elif args.noise:
+        src = SyntheticSource(fps=args.fps)
+    else:
+        src = TraceSource(args.trace, fps=args.fps)
+    sw, sh = (int(v) for v in args.screen.lower().split("x"))
+
+    ok, _ = soak(
+        src, args.hours * 3600.0,
+        params={"record_trace": args.record_trace} if args.record_trace else None,
+        interval_s=args.interval, warmup_s=args.warmup,
+        max_rss_mb=args.max_rss_mb, max_traced_mb=args.max_traced_mb,
+        max_handles=args.max_handles, max_threads=args.max_threads,
+        top=args.top, screen_size=(sw, sh),
+    )
+    sys.exit(0 if ok else 1)
@@ -1,12 +1,24 @@
+import os
 import tkinter as tk
 import threading
 from threading import Event
 
 from gesture_engine import run_gesture
+from gesture_events import EventBus, SocketStream
+from sampling_profiler import profile_thread
 
 gesture_thread = None
 stop_event = Event()
 
+# recognized actions are also published here (other apps can subscribe)
+event_bus = EventBus()
+
+# filled by the engine once per second (fps / inference time / quality level)
+engine_metrics = {}
+
+PROFILE_SECONDS = 10
+profiler = None
+
 # ===== Colors =====
 BG = "#0b1220"
 PANEL = "#101a2f"
@@ -200,6 +212,11 @@ def make_block(root, title, desc, unit,
 def main():
     global gesture_thread, stop_event
 
+    port = os.environ.get("GESTURE_EVENT_PORT")
+    if port:
+        stream = event_bus.subscribe(SocketStream(port=int(port)))
+        print(f"📡 Gesture events on tcp://{stream.address[0]}:{stream.address[1]}")
+
     root = tk.Tk()
     root.title("Gesture Mouse Control")
     root.geometry("560x700")
@@ -227,8 +244,26 @@ def main():
                            padx=12, pady=8)
     status_pill.pack(side="left")
 
+    metrics_var = tk.StringVar(value="")
+    tk.Label(root, textvariable=metrics_var, bg=BG, fg=MUTED,
+             font=("Menlo", 9)).pack(anchor="w", padx=18, pady=(0, 4))
+
+    def refresh_metrics():
+        if gesture_thread and gesture_thread.is_alive() and engine_metrics:
+            m = engine_metrics
+            text = f"{m.get('fps', 0):.0f} FPS · MediaPipe {m.get('detect_ms', 0):.1f} ms · {m.get('quality', '-')}"
+            if m.get("quality_switches"):
+                text += f" ({m['quality_switches']} switches)"
+            metrics_var.set(text)
+        else:
+            metrics_var.set("")
+        if profiler is not None and not profiler.running and profile_btn["state"] == "disabled":
+            # results are printed + written to ~/.gesture_mouse_control/profiles
+            profile_btn.config(text="⏱ Profile", state="normal")
+        root.after(1000, refresh_metrics)
+
     def worker(params):
-        run_gesture(stop_event, params, show_preview=False)
+        run_gesture(stop_event, params, show_preview=False, bus=event_bus, metrics=engine_metrics)
 
     def on_start():
         nonlocal start_btn, stop_btn
@@ -243,6 +278,7 @@ def main():
         stop_btn.config(state="normal", bg=BTN_STOP_BG)
 
         stop_event = Event()
+        engine_metrics.clear()
 
         params = {
             "smooth": float(smooth_state["v"]),
@@ -295,6 +331,32 @@ def main():
     )
     stop_btn.pack(side="right")
 
+    def on_profile():
+        global profiler
+
+        if not (gesture_thread and gesture_thread.is_alive()):
+            return
+        if profiler is not None and profiler.running:
+            return
+
+        profile_btn.config(text=f"⏱ {PROFILE_SECONDS}s...", state="disabled")
+        profiler = profile_thread(gesture_thread, duration=PROFILE_SECONDS)
+
+    profile_btn = tk.Button(
+    topbar,
+    text="⏱ Profile",
+    command=on_profile,
+    bg=PANEL,
+    fg=BTN_TEXT,
+    bd=0,
+    activebackground="#2b7fff",
+    activeforeground=BTN_TEXT,
+    padx=12,
+    pady=12,
+    font=("Helvetica", 11, "bold")
+    )
+    profile_btn.pack(side="right", padx=(0, 10))
+
     # blocks
     smooth_state, _ = make_block(
         root,
@@ -337,9 +399,13 @@ def main():
     )
 
     def on_close():
+        if profiler is not None:
+            profiler.stop()
         on_stop()
+        event_bus.close()
         root.destroy()
 
+    refresh_metrics()
     root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 